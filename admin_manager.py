@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 import csv
 import io
+from stage_timer import StageTimingStore
 
 class AdminManager:
     """Comprehensive admin management functionality"""
@@ -235,6 +236,10 @@ class AdminManager:
         conn.close()
         return report
     
+    def get_stage_timing_report(self, days=30, document_type=None) -> List[Dict]:
+        """Document analysis stage timings per document type, slowest first"""
+        return StageTimingStore(self.db_path).histograms(days, document_type)
+    
     def export_applications_csv(self, status_filter=None) -> str:
         """Export applications to CSV format"""
         applications = self.get_detailed_applications(status_filter)
@@ -1,18 +1,14 @@
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler
-import spacy
 import re
 from typing import Dict, List, Tuple, Optional
 import json
 import logging
+import nlp_models
+from lazy_imports import lazy_import
+from university_catalog import CatalogSource, UniversityCatalog, get_catalog_source
+from program_embeddings import ProgramEmbeddingIndex, get_embedding_index
+from score_percentiles import ScorePercentiles, get_score_percentiles
 
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    nlp = None
+np = lazy_import('numpy')
 
 class ProfileAnalyzer:
     """Analyze student profiles and extract insights"""
@@ -72,7 +68,33 @@ class ProfileAnalyzer:
 
     def analyze_statement_of_purpose(self, sop_text: str) -> Dict[str, any]:
         """Analyze Statement of Purpose using NLP"""
-        analysis = {
+        return self.analyze_statements_of_purpose([sop_text])[0]
+
+    def analyze_statements_of_purpose(self, sop_texts: List[str], batch_size: int = 32,
+                                      n_process: int = 1) -> List[Dict[str, any]]:
+        """Analyze many Statements of Purpose in one nlp.pipe pass"""
+        analyses = [self._empty_sop_analysis() for _ in sop_texts]
+        
+        if nlp_models.get_nlp() is None:
+            return analyses
+        
+        indexed = [(i, text) for i, text in enumerate(sop_texts) if text]
+        
+        # Process with spaCy (noun chunks need the parser; lemmas are never used)
+        docs = nlp_models.parse_batch(
+            [text[:2000] for _, text in indexed],  # Limit for performance
+            disable=nlp_models.NOUN_CHUNK_DISABLE,
+            batch_size=batch_size,
+            n_process=n_process
+        )
+        
+        for (i, sop_text), doc in zip(indexed, docs):
+            self._fill_sop_analysis(analyses[i], sop_text, doc)
+        
+        return analyses
+
+    def _empty_sop_analysis(self) -> Dict[str, any]:
+        return {
             'word_count': 0,
             'readability_score': 0,
             'key_themes': [],
@@ -80,17 +102,13 @@ class ProfileAnalyzer:
             'structure_score': 0,
             'recommendations': []
         }
-        
-        if not sop_text or not nlp:
-            return analysis
-        
+
+    def _fill_sop_analysis(self, analysis: Dict, sop_text: str, doc):
+        """Fill in SoP metrics from the text and its parsed spaCy doc"""
         # Basic metrics
         words = sop_text.split()
         analysis['word_count'] = len(words)
         
-        # Process with spaCy
-        doc = nlp(sop_text[:2000])  # Limit for performance
-        
         # Extract key themes using named entities and noun phrases
         themes = set()
         for ent in doc.ents:
@@ -118,8 +136,6 @@ class ProfileAnalyzer:
         # Theme diversity
         if len(themes) < 5:
             analysis['recommendations'].append("Consider adding more diverse themes and experiences.")
-        
-        return analysis
 
     def calculate_profile_completeness(self, profile: Dict) -> Dict[str, any]:
         """Calculate how complete the profile is"""
@@ -152,120 +168,148 @@ class ProfileAnalyzer:
 class UniversityMatcher:
     """Match students with suitable universities"""
     
-    def __init__(self):
-        # Sample university database (in production, this would be a real database)
-        self.universities = [
-            {
-                'name': 'Stanford University',
-                'country': 'USA',
-                'ranking': 95,
-                'min_gpa': 3.7,
-                'min_gre': 320,
-                'min_toefl': 100,
-                'programs': ['Computer Science', 'Engineering', 'Business', 'Medicine'],
-                'acceptance_rate': 4.3,
-                'tuition': 55000
-            },
-            {
-                'name': 'MIT',
-                'country': 'USA',
-                'ranking': 98,
-                'min_gpa': 3.8,
-                'min_gre': 325,
-                'min_toefl': 100,
-                'programs': ['Computer Science', 'Engineering', 'Physics', 'Mathematics'],
-                'acceptance_rate': 6.7,
-                'tuition': 53450
-            },
-            {
-                'name': 'University of Toronto',
-                'country': 'Canada',
-                'ranking': 85,
-                'min_gpa': 3.5,
-                'min_gre': 310,
-                'min_toefl': 93,
-                'programs': ['Computer Science', 'Engineering', 'Medicine', 'Business'],
-                'acceptance_rate': 43.0,
-                'tuition': 45000
-            },
-            {
-                'name': 'University of Melbourne',
-                'country': 'Australia',
-                'ranking': 80,
-                'min_gpa': 3.2,
-                'min_gre': 305,
-                'min_toefl': 79,
-                'programs': ['Computer Science', 'Engineering', 'Business', 'Arts'],
-                'acceptance_rate': 70.0,
-                'tuition': 35000
-            },
-            {
-                'name': 'Carnegie Mellon University',
-                'country': 'USA',
-                'ranking': 88,
-                'min_gpa': 3.6,
-                'min_gre': 315,
-                'min_toefl': 95,
-                'programs': ['Computer Science', 'Engineering', 'Business', 'Design'],
-                'acceptance_rate': 17.0,
-                'tuition': 52000
-            }
-        ]
+    # Points per requirement: met, or within the margin below it
+    REQUIREMENT_POINTS = 25
+    NEAR_POINTS = 15
+    GPA_MARGIN = 0.3
+    GRE_MARGIN = 15
+    TOEFL_MARGIN = 10
+    PROGRAM_POINTS = 25
+    MIN_MATCH_SCORE = 40
+    
+    # Programs the embedding search may add to the lexical program matches
+    SEMANTIC_TOP_K = 10
+    
+    def __init__(self, catalog: Optional[UniversityCatalog] = None, source: Optional[CatalogSource] = None,
+                 embeddings: Optional[ProgramEmbeddingIndex] = None):
+        # A fixed catalog, or the shared per-process one that follows its file
+        self._catalog = catalog
+        self.source = source if source is not None or catalog is not None else get_catalog_source()
+        # Semantic program matches; unavailable indexes leave matching lexical
+        self.embeddings = embeddings if embeddings is not None else get_embedding_index()
 
-    def find_matching_universities(self, profile: Dict, limit: int = 5) -> List[Dict]:
-        """Find universities that match student profile"""
-        matches = []
+    @property
+    def catalog(self) -> UniversityCatalog:
+        return self._catalog if self._catalog is not None else self.source.get()
+
+    def _requirement_points(self, value, minimum, margin):
+        """Points for every row at once: full when value meets the minimum, partial within margin"""
+        return np.where(value >= minimum, self.REQUIREMENT_POINTS,
+                        np.where(value >= minimum - margin, self.NEAR_POINTS, 0))
+
+    def _program_matches(self, catalog: UniversityCatalog, target_program: str,
+                         themes: Optional[List[str]]) -> Tuple[List[int], List[int]]:
+        """Program ids matching the course lexically, and ids only the embedding search adds"""
+        lexical_ids = catalog.matching_program_ids(target_program)
+        if not target_program:
+            return lexical_ids, []
+        
+        lexical = set(lexical_ids)
+        semantic_ids = []
+        for name, _ in self.embeddings.search(target_program, themes or (), k=self.SEMANTIC_TOP_K):
+            program_id = catalog.program_lookup.get(name)
+            if program_id is not None and program_id not in lexical:
+                semantic_ids.append(program_id)
+        return lexical_ids, semantic_ids
+
+    def find_matching_universities(self, profile: Dict, limit: int = 5,
+                                   countries: Optional[List[str]] = None,
+                                   themes: Optional[List[str]] = None) -> List[Dict]:
+        """Find universities that match student profile, optionally only in the given countries.
+
+        ``themes`` (e.g. key themes of the SoP) steer the course in the
+        semantic program search when an embedding index is available.
+        """
+        # One catalog for the whole query, even if a reload swaps it meanwhile
+        catalog = self.catalog
+        if limit <= 0 or catalog.size == 0:
+            return []
+        
+        student_gpa = float(profile.get('gpa') or 0)
+        student_gre = int(profile.get('gre_score') or 0)
+        student_toefl = int(profile.get('toefl_score') or 0)
+        target_program = (profile.get('course') or '').lower()
+        
+        # Only rows offering the applicant's level (and in the wanted countries) are scored
+        rows = catalog.candidate_rows(countries, profile.get('academic_level'))
+        lexical_ids, semantic_ids = self._program_matches(catalog, target_program, themes)
+        program_rows = catalog.program_rows(lexical_ids + semantic_ids)
+        related = set(semantic_ids)
+        if rows is None:
+            rows = np.arange(catalog.size)
+            starts = catalog.university_starts
+            program_match = np.zeros(catalog.size, dtype=bool)
+            program_match[program_rows] = True
+        else:
+            if len(rows) == 0:
+                return []
+            universities = catalog.university_rows[rows]
+            starts = np.flatnonzero(np.concatenate(([True], universities[1:] != universities[:-1])))
+            program_match = np.isin(rows, program_rows, assume_unique=True)
+        
+        # Score every candidate row in one pass
+        scores = (
+            self._requirement_points(student_gpa, catalog.min_gpa[rows], self.GPA_MARGIN)
+            + self._requirement_points(student_gre, catalog.min_gre[rows], self.GRE_MARGIN)
+            + self._requirement_points(student_toefl, catalog.min_toefl[rows], self.TOEFL_MARGIN)
+            + self.PROGRAM_POINTS * program_match
+        )
         
-        student_gpa = float(profile.get('gpa', 0))
-        student_gre = int(profile.get('gre_score', 0))
-        student_toefl = int(profile.get('toefl_score', 0))
-        target_program = profile.get('course', '').lower()
-        
-        for uni in self.universities:
-            match_score = 0
-            reasons = []
-            
-            # GPA match
-            if student_gpa >= uni['min_gpa']:
-                match_score += 25
-                reasons.append(f"GPA ({student_gpa}) meets requirement ({uni['min_gpa']})")
-            elif student_gpa >= uni['min_gpa'] - 0.3:
-                match_score += 15
-                reasons.append(f"GPA ({student_gpa}) close to requirement ({uni['min_gpa']})")
-            
-            # GRE match
-            if student_gre >= uni['min_gre']:
-                match_score += 25
-                reasons.append(f"GRE ({student_gre}) meets requirement ({uni['min_gre']})")
-            elif student_gre >= uni['min_gre'] - 15:
-                match_score += 15
-                reasons.append(f"GRE ({student_gre}) close to requirement ({uni['min_gre']})")
-            
-            # TOEFL match
-            if student_toefl >= uni['min_toefl']:
-                match_score += 25
-                reasons.append(f"TOEFL ({student_toefl}) meets requirement ({uni['min_toefl']})")
-            elif student_toefl >= uni['min_toefl'] - 10:
-                match_score += 15
-                reasons.append(f"TOEFL ({student_toefl}) close to requirement ({uni['min_toefl']})")
-            
-            # Program match
-            program_match = any(target_program in prog.lower() for prog in uni['programs'])
-            if program_match:
-                match_score += 25
-                reasons.append(f"Offers {target_program} program")
-            
-            if match_score > 40:  # Minimum threshold
-                matches.append({
-                    'university': uni,
-                    'match_score': match_score,
-                    'match_reasons': reasons,
-                    'category': self._categorize_match(match_score, uni['acceptance_rate'])
-                })
-        
-        # Sort by match score and return top matches
-        matches.sort(key=lambda x: x['match_score'], reverse=True)
-        return matches[:limit]
+        # Best row per university; the row position in the key keeps ties in catalog order
+        size = len(rows)
+        keys = scores * size + (size - 1 - np.arange(size))
+        best_keys = np.maximum.reduceat(keys, starts)
+        candidates = np.flatnonzero(best_keys // size > self.MIN_MATCH_SCORE)
+        
+        # Top-k without sorting the whole catalog
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-best_keys[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-best_keys[candidates])]
+        
+        matches = []
+        for best_key in best_keys[candidates]:
+            position = size - 1 - int(best_key % size)
+            match_score = int(best_key // size)
+            row = int(rows[position])
+            uni = catalog.record(row)
+            matches.append({
+                'university': uni,
+                'match_score': match_score,
+                'match_reasons': self._match_reasons(
+                    uni, student_gpa, student_gre, student_toefl, target_program, bool(program_match[position]),
+                    int(catalog.program_ids[row]) in related
+                ),
+                'category': self._categorize_match(match_score, uni['acceptance_rate'])
+            })
+        
+        return matches
+
+    def _match_reasons(self, uni: Dict, student_gpa: float, student_gre: int, student_toefl: int,
+                       target_program: str, program_match: bool, related_program=False) -> List[str]:
+        """Explain a returned match (only built for the rows that are returned)"""
+        reasons = []
+        
+        if student_gpa >= uni['min_gpa']:
+            reasons.append(f"GPA ({student_gpa}) meets requirement ({uni['min_gpa']})")
+        elif student_gpa >= uni['min_gpa'] - self.GPA_MARGIN:
+            reasons.append(f"GPA ({student_gpa}) close to requirement ({uni['min_gpa']})")
+        
+        if student_gre >= uni['min_gre']:
+            reasons.append(f"GRE ({student_gre}) meets requirement ({uni['min_gre']})")
+        elif student_gre >= uni['min_gre'] - self.GRE_MARGIN:
+            reasons.append(f"GRE ({student_gre}) close to requirement ({uni['min_gre']})")
+        
+        if student_toefl >= uni['min_toefl']:
+            reasons.append(f"TOEFL ({student_toefl}) meets requirement ({uni['min_toefl']})")
+        elif student_toefl >= uni['min_toefl'] - self.TOEFL_MARGIN:
+            reasons.append(f"TOEFL ({student_toefl}) close to requirement ({uni['min_toefl']})")
+        
+        if program_match and related_program:
+            reasons.append(f"Offers {uni['program']}, related to {target_program}")
+        elif program_match:
+            reasons.append(f"Offers {target_program} program")
+        
+        return reasons
 
     def _categorize_match(self, score: int, acceptance_rate: float) -> str:
         """Categorize university matches"""
@@ -309,7 +353,9 @@ class RecommendationEngine:
         analysis['completeness'] = self.profile_analyzer.calculate_profile_completeness(profile)
         
         # Find matching universities
-        analysis['university_recommendations'] = self.university_matcher.find_matching_universities(profile)
+        analysis['university_recommendations'] = self.university_matcher.find_matching_universities(
+            profile, themes=analysis['sop_analysis'].get('key_themes')
+        )
         
         # Generate improvement suggestions
         analysis['improvement_suggestions'] = self._generate_improvement_suggestions(
@@ -411,8 +457,10 @@ class RecommendationEngine:
 class AIInsightGenerator:
     """Generate AI-powered insights and predictions"""
     
-    def __init__(self):
+    def __init__(self, percentiles: Optional[ScorePercentiles] = None):
         self.recommendation_engine = RecommendationEngine()
+        # Ranks overall scores against stored AI analyses
+        self.percentiles = percentiles if percentiles is not None else get_score_percentiles()
     
     def generate_application_insights(self, application_data: Dict, documents_analysis: Dict = None) -> Dict:
         """Generate comprehensive insights for an application"""
@@ -426,7 +474,7 @@ class AIInsightGenerator:
         ai_analysis['predictions'] = self._generate_predictions(application_data, ai_analysis)
         
         # Add competitive analysis
-        ai_analysis['competitive_analysis'] = self._generate_competitive_analysis(ai_analysis)
+        ai_analysis['competitive_analysis'] = self._generate_competitive_analysis(ai_analysis, application_data)
         
         return ai_analysis
     
@@ -460,11 +508,19 @@ class AIInsightGenerator:
             ]
         }
     
-    def _generate_competitive_analysis(self, analysis: Dict) -> Dict:
+    def _generate_competitive_analysis(self, analysis: Dict, profile: Optional[Dict] = None) -> Dict:
         """Generate competitive analysis against typical applicants"""
         
         overall_score = analysis['overall_assessment']['overall_score']
+        profile = profile or {}
+        
+        ranking = self.percentiles.rank(
+            overall_score, profile.get('target_university'), profile.get('course'), profile.get('id')
+        )
+        if ranking:
+            return self._ranked_competitive_analysis(analysis, ranking, profile)
         
+        # Too few stored analyses to rank against; use fixed score bands
         if overall_score >= 80:
             competitive_position = "Top 15%"
             benchmark = "Above average compared to successful applicants"
@@ -485,6 +541,39 @@ class AIInsightGenerator:
             'areas_for_improvement': self._identify_weaknesses(analysis)
         }
     
+    def _ranked_competitive_analysis(self, analysis: Dict, ranking: Dict, profile: Dict) -> Dict:
+        """Competitive position from the score's percentile among past applicants"""
+        percentile = ranking['percentile']
+        peers = {
+            'university': f"applicants to {(profile.get('target_university') or '').strip()}",
+            'course': f"{(profile.get('course') or '').strip()} applicants",
+            'all': "all applicants"
+        }[ranking['segment']]
+        
+        if percentile >= 40:
+            competitive_position = f"Top {max(1, round(100 - percentile))}%"
+        else:
+            competitive_position = f"Bottom {max(1, round(percentile))}%"
+        
+        if percentile >= 75:
+            benchmark = f"Above average compared to {peers}"
+        elif percentile >= 40:
+            benchmark = f"Average compared to {peers}"
+        elif percentile >= 20:
+            benchmark = f"Below average compared to {peers} - needs improvement"
+        else:
+            benchmark = f"Significantly below average compared to {peers}"
+        
+        return {
+            'competitive_position': competitive_position,
+            'benchmark_comparison': benchmark,
+            'percentile': percentile,
+            'peer_group': peers,
+            'sample_size': ranking['sample_size'],
+            'areas_of_strength': self._identify_strengths(analysis),
+            'areas_for_improvement': self._identify_weaknesses(analysis)
+        }
+    
     def _identify_strengths(self, analysis: Dict) -> List[str]:
         """Identify profile strengths"""
         strengths = []
@@ -0,0 +1,305 @@
+import sqlite3
+import json
+import multiprocessing
+import uuid
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from document_processor import DocumentAnalyzer, warm_up
+from document_state import DocumentStateStore
+from stage_timer import StageTimingStore
+
+# Analyzer owned by each OCR worker process (set up by the pool initializer)
+_worker_analyzer = None
+
+# The pool is started from a request thread. Forking a multi-threaded server can leave children
+# deadlocked on locks other threads held, so workers start from a clean process instead
+# (_init_worker does all the per-process setup)
+_MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+def _init_worker(tesseract_path=None, db_path='app.db', memory_budget_mb=None, region_ocr=False):
+    """Build one DocumentAnalyzer per worker so models are loaded once per process"""
+    global _worker_analyzer
+    _worker_analyzer = DocumentAnalyzer(
+        tesseract_path, state_store=DocumentStateStore(db_path), memory_budget_mb=memory_budget_mb,
+        region_ocr=region_ocr
+    )
+    # The job pool is already one process per CPU; page-level pools inside each worker would oversubscribe
+    _worker_analyzer.processor.pdf_workers = 1
+    # Pay the OCR/NLP import and model load cost before the first job arrives
+    warm_up()
+
+def _run_analysis_job(job_id: str, db_path: str, application_id: int,
+                      documents: List[Dict], form_data: Dict) -> float:
+    """Worker entry point: analyze documents and store the results"""
+    _set_job_status(db_path, job_id, 'running')
+
+    analyzer = _worker_analyzer or DocumentAnalyzer(state_store=DocumentStateStore(db_path))
+    analysis_results = analyzer.analyze_application_documents(application_id, documents, form_data)
+    confidence = analysis_results['summary']['overall_confidence']
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO analysis_results (application_id, analysis_type, result_data, confidence_score)
+        VALUES (?, ?, ?, ?)
+    ''', (application_id, 'document_verification', json.dumps(analysis_results), confidence))
+
+    cursor.execute('''
+        UPDATE analysis_jobs
+        SET status = 'completed', result_id = ?, confidence_score = ?, completed_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', (cursor.lastrowid, confidence, job_id))
+    StageTimingStore(db_path).record(application_id, analysis_results.get('timings', {}), conn)
+    conn.commit()
+    conn.close()
+
+    return confidence
+
+def _run_preanalysis(db_path: str, application_id: int, documents: List[Dict]) -> int:
+    """Worker entry point: extract freshly uploaded documents so analysis can reuse them"""
+    analyzer = _worker_analyzer or DocumentAnalyzer(state_store=DocumentStateStore(db_path))
+    return analyzer.preanalyze_documents(application_id, documents)
+
+def _set_job_status(db_path: str, job_id: str, status: str, error: str = None):
+    """Update the status of a job row"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    if status == 'running':
+        cursor.execute('''
+            UPDATE analysis_jobs SET status = ?, started_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (status, job_id))
+    else:
+        cursor.execute('''
+            UPDATE analysis_jobs SET status = ?, error = ?, completed_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (status, error, job_id))
+
+    conn.commit()
+    conn.close()
+
+class AnalysisJobQueue:
+    """Run document analysis as background jobs on a process pool of OCR workers"""
+
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    def __init__(self, db_path='app.db', max_workers=None, tesseract_path=None, memory_budget_mb=None,
+                 region_ocr=False):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.tesseract_path = tesseract_path
+        # Resident memory each worker should stay under (None = unbounded)
+        self.memory_budget_mb = memory_budget_mb
+        # Full-quality OCR only on text blocks near score keywords (see DocumentProcessor)
+        self.region_ocr = region_ocr
+        self._executor = None
+        self._lock = threading.Lock()
+        # Upload-time extractions still running, per application
+        self._preanalysis: Dict[int, set] = {}
+
+    def initialize_tables(self):
+        """Create the job tracking and stage timing tables"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_jobs (
+                id TEXT PRIMARY KEY,
+                application_id INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                error TEXT,
+                result_id INTEGER,
+                confidence_score REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                completed_at TIMESTAMP,
+                FOREIGN KEY (application_id) REFERENCES applications (id),
+                FOREIGN KEY (result_id) REFERENCES analysis_results (id)
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+        StageTimingStore(self.db_path).initialize_table()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use so importing the app stays cheap"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=_MP_CONTEXT,
+                    initializer=_init_worker,
+                    initargs=(self.tesseract_path, self.db_path, self.memory_budget_mb, self.region_ocr)
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Drop a broken pool (a worker died) so the next submit starts a fresh one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _submit(self, fn, *args):
+        """Submit to the pool, replacing it once if it turns out to be broken"""
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(fn, *args)
+
+    def preanalyze(self, application_id: int, documents: List[Dict]):
+        """Start extracting just-uploaded documents in the background"""
+        if not documents:
+            return
+
+        try:
+            executor, future = self._submit(_run_preanalysis, self.db_path, application_id, documents)
+        except RuntimeError as e:
+            print(f"Pre-analysis for application {application_id} not started: {e}")
+            return
+        with self._lock:
+            self._preanalysis.setdefault(application_id, set()).add(future)
+        future.add_done_callback(lambda f: self._on_preanalysis_done(application_id, executor, f))
+
+    def _on_preanalysis_done(self, application_id: int, executor: ProcessPoolExecutor, future):
+        with self._lock:
+            pending = self._preanalysis.get(application_id, set())
+            pending.discard(future)
+            if not pending:
+                self._preanalysis.pop(application_id, None)
+
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._discard_executor(executor)
+        if error is not None:
+            # Not fatal: the analysis job extracts anything that wasn't pre-analyzed
+            print(f"Pre-analysis for application {application_id} failed: {error}")
+
+    def submit(self, application_id: int, documents: List[Dict], form_data: Dict) -> str:
+        """Enqueue an analysis job and return its id"""
+        job_id = uuid.uuid4().hex
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO analysis_jobs (id, application_id, status) VALUES (?, ?, 'queued')
+        ''', (job_id, application_id))
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            pending = list(self._preanalysis.get(application_id, ()))
+
+        if not pending:
+            self._start_job(job_id, application_id, documents, form_data)
+            return job_id
+
+        # Start once upload-time extraction finishes, so the job reuses it instead of redoing the OCR
+        def start_after_preanalysis():
+            wait(pending)
+            self._start_job(job_id, application_id, documents, form_data)
+
+        threading.Thread(target=start_after_preanalysis, daemon=True).start()
+        return job_id
+
+    def _start_job(self, job_id: str, application_id: int, documents: List[Dict], form_data: Dict,
+                   retry_on_crash=True):
+        try:
+            executor, future = self._submit(
+                _run_analysis_job, job_id, self.db_path, application_id, documents, form_data
+            )
+        except RuntimeError as e:
+            # Pool shut down, or broken again right after being replaced
+            _set_job_status(self.db_path, job_id, 'failed', str(e))
+            return
+        future.add_done_callback(
+            lambda f: self._on_job_done(job_id, executor, f, (application_id, documents, form_data), retry_on_crash)
+        )
+
+    def _on_job_done(self, job_id: str, executor: ProcessPoolExecutor, future, job_args, retry_on_crash):
+        """Record failures raised inside the worker (or by a crashed worker)"""
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._discard_executor(executor)
+            # Every job in flight on the pool fails with it; give each one more try on a fresh pool,
+            # so only a job that crashes its worker again is marked failed
+            if retry_on_crash:
+                print(f"Analysis job {job_id} lost its worker; retrying on a new pool")
+                # Not from this callback: it runs on the old pool's management thread
+                threading.Thread(
+                    target=self._start_job, args=(job_id,) + tuple(job_args), kwargs={'retry_on_crash': False},
+                    daemon=True
+                ).start()
+                return
+        if error is not None:
+            print(f"Analysis job {job_id} failed: {error}")
+            _set_job_status(self.db_path, job_id, 'failed', str(error))
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get the status of a job"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id, application_id, status, error, result_id, confidence_score,
+                   created_at, started_at, completed_at
+            FROM analysis_jobs WHERE id = ?
+        ''', (job_id,))
+
+        job = cursor.fetchone()
+        conn.close()
+
+        if not job:
+            return None
+
+        columns = ['id', 'application_id', 'status', 'error', 'result_id', 'confidence_score',
+                  'created_at', 'started_at', 'completed_at']
+        return dict(zip(columns, job))
+
+    def get_active_job(self, application_id: int) -> Optional[Dict]:
+        """Get the queued or running job for an application, if any"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id FROM analysis_jobs
+            WHERE application_id = ? AND status IN (?, ?)
+            ORDER BY created_at DESC LIMIT 1
+        ''', (application_id,) + self.ACTIVE_STATUSES)
+
+        row = cursor.fetchone()
+        conn.close()
+
+        return self.get_job(row[0]) if row else None
+
+    def fail_interrupted_jobs(self) -> int:
+        """Mark jobs left active by a previous process as failed"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            UPDATE analysis_jobs
+            SET status = 'failed', error = 'Interrupted by server restart', completed_at = CURRENT_TIMESTAMP
+            WHERE status IN (?, ?)
+        ''', self.ACTIVE_STATUSES)
+
+        count = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return count
+
+    def shutdown(self, wait=True):
+        """Stop the worker pool"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
@@ -1,28 +1,45 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, Response
+from flask import Flask, render_template, request, redirect, url_for, flash, session, Response, jsonify
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import sqlite3
 import os
-import uuid
 import mimetypes
 import json
 from datetime import datetime
-from document_processor import DocumentAnalyzer
 from ai_recommender import AIInsightGenerator
 from admin_manager import AdminManager, NotificationManager
 from email_manager import NotificationService, EmailManager
+from analysis_queue import AnalysisJobQueue
+from upload_store import UploadStore
 import threading
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change this in production
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['WORKER_MEMORY_BUDGET_MB'] = None  # e.g. 1024 to bound each analysis worker
+app.config['REGION_OCR'] = False  # OCR only the text blocks near score keywords
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'doc', 'docx'}
 
 # Initialize notification service
 notification_service = NotificationService()
 
+# Background document analysis (OCR runs in a process pool, not the request thread)
+analysis_queue = AnalysisJobQueue(
+    memory_budget_mb=app.config['WORKER_MEMORY_BUDGET_MB'], region_ocr=app.config['REGION_OCR']
+)
+
+# Uploads are stored once per distinct content and shared between documents
+upload_store = UploadStore(app.config['UPLOAD_FOLDER'])
+
+def start_preanalysis(application_id, documents):
+    """Queue upload-time extraction; failures only mean the analysis job does the work later"""
+    try:
+        analysis_queue.preanalyze(application_id, documents)
+    except Exception as e:
+        print(f"Could not start pre-analysis for application {application_id}: {e}")
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -89,6 +106,7 @@ def init_db():
             file_path TEXT NOT NULL,
             file_size INTEGER,
             mime_type TEXT,
+            content_hash TEXT,
             uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (application_id) REFERENCES applications (id)
         )
@@ -330,44 +348,50 @@ def submit_application():
         
         # Handle file uploads
         uploaded_files = []
+        new_documents = []
         document_types = ['transcript', 'sop', 'resume', 'passport', 'test_scores', 'recommendation_letters']
         
         for doc_type in document_types:
             files = request.files.getlist(f'{doc_type}[]')
             for file in files:
                 if file and file.filename != '' and allowed_file(file.filename):
-                    # Generate unique filename
                     original_filename = secure_filename(file.filename)
                     file_extension = original_filename.rsplit('.', 1)[1].lower()
-                    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-                    
-                    # Create subdirectory for this application
-                    app_upload_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(application_id))
-                    os.makedirs(app_upload_dir, exist_ok=True)
-                    
-                    file_path = os.path.join(app_upload_dir, unique_filename)
-                    file.save(file_path)
                     
-                    # Get file info
-                    file_size = os.path.getsize(file_path)
-                    mime_type = mimetypes.guess_type(file_path)[0]
+                    # Store by content hash (computed while streaming to disk) so identical
+                    # uploads across applications share one file
+                    content_hash, file_path, file_size = upload_store.save(file, file_extension, cursor)
+                    stored_filename = os.path.basename(file_path)
+                    mime_type = mimetypes.guess_type(original_filename)[0]
                     
                     # Save document record
                     cursor.execute('''
                         INSERT INTO documents (
                             application_id, document_type, original_filename,
-                            stored_filename, file_path, file_size, mime_type
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                            stored_filename, file_path, file_size, mime_type, content_hash
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                     ''', (
                         application_id, doc_type, original_filename,
-                        unique_filename, file_path, file_size, mime_type
+                        stored_filename, file_path, file_size, mime_type, content_hash
                     ))
                     
                     uploaded_files.append({'type': doc_type, 'filename': original_filename})
+                    new_documents.append({
+                        'id': cursor.lastrowid,
+                        'document_type': doc_type,
+                        'original_filename': original_filename,
+                        'stored_filename': stored_filename,
+                        'file_path': file_path,
+                        'mime_type': mime_type,
+                        'content_hash': content_hash
+                    })
         
         conn.commit()
         conn.close()
         
+        # Start OCR/extraction now so a later analysis only has to compare against the form
+        start_preanalysis(application_id, new_documents)
+        
         flash(f'Application submitted successfully! Uploaded {len(uploaded_files)} documents.')
         return redirect(url_for('view_applications'))
         
@@ -435,7 +459,11 @@ def view_application_details(app_id):
     
     conn.close()
     
-    return render_template('application_details.html', application=application, documents=documents)
+    # Pending background analysis, so the page can poll for completion
+    active_job = analysis_queue.get_active_job(app_id)
+    
+    return render_template('application_details.html', application=application, documents=documents,
+                         active_job=active_job)
 
 @app.route('/application/<int:app_id>/analyze')
 @login_required
@@ -461,7 +489,7 @@ def analyze_application(app_id):
     
     # Get documents
     cursor.execute('''
-        SELECT document_type, original_filename, stored_filename, file_path, mime_type
+        SELECT document_type, original_filename, stored_filename, file_path, mime_type, id, content_hash
         FROM documents WHERE application_id = ?
     ''', (app_id,))
     documents = cursor.fetchall()
@@ -470,6 +498,12 @@ def analyze_application(app_id):
         flash('No documents found to analyze!')
         return redirect(url_for('view_application_details', app_id=app_id))
     
+    # Don't queue a second job while one is still pending
+    if analysis_queue.get_active_job(app_id):
+        conn.close()
+        flash('Document analysis is already in progress.')
+        return redirect(url_for('view_application_details', app_id=app_id))
+    
     try:
         # Convert application tuple to dict for easier handling
         app_columns = ['id', 'user_id', 'full_name', 'email', 'phone', 'date_of_birth', 
@@ -487,36 +521,60 @@ def analyze_application(app_id):
                 'original_filename': doc[1],
                 'stored_filename': doc[2],
                 'file_path': doc[3],
-                'mime_type': doc[4]
+                'mime_type': doc[4],
+                'id': doc[5],
+                'content_hash': doc[6]
             }
             doc_list.append(doc_dict)
         
-        # Initialize analyzer and process documents
-        analyzer = DocumentAnalyzer()
-        analysis_results = analyzer.analyze_application_documents(app_id, doc_list, form_data)
-        
-        # Store analysis results in database
-        cursor.execute('''
-            INSERT INTO analysis_results (application_id, analysis_type, result_data, confidence_score)
-            VALUES (?, ?, ?, ?)
-        ''', (
-            app_id,
-            'document_verification',
-            json.dumps(analysis_results),
-            analysis_results['summary']['overall_confidence']
-        ))
-        
-        conn.commit()
-        flash(f'Analysis completed! Confidence Score: {analysis_results["summary"]["overall_confidence"]:.1f}%')
+        # Hand the work to the OCR worker pool instead of blocking this request
+        analysis_queue.submit(app_id, doc_list, form_data)
+        flash('Document analysis started. Results will appear when processing finishes.')
         
     except Exception as e:
-        flash(f'Error during analysis: {str(e)}')
+        flash(f'Error starting analysis: {str(e)}')
         print(f"Analysis error: {e}")  # For debugging
         
     finally:
         conn.close()
     
-    return redirect(url_for('view_analysis_results', app_id=app_id))
+    return redirect(url_for('view_application_details', app_id=app_id))
+
+@app.route('/application/<int:app_id>/analysis/job/<job_id>')
+@login_required
+def analysis_job_status(app_id, job_id):
+    """Report the status of a background analysis job"""
+    conn = sqlite3.connect('app.db')
+    cursor = conn.cursor()
+    
+    # Check access permissions
+    if current_user.role == 'student':
+        cursor.execute('SELECT id FROM applications WHERE id = ? AND user_id = ?', (app_id, current_user.id))
+    else:
+        cursor.execute('SELECT id FROM applications WHERE id = ?', (app_id,))
+    
+    application = cursor.fetchone()
+    conn.close()
+    
+    job = analysis_queue.get_job(job_id)
+    if not application or not job or job['application_id'] != app_id:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'completed_at': job['completed_at']
+    }
+    
+    if job['status'] == 'completed':
+        response['confidence_score'] = job['confidence_score']
+        response['results_url'] = url_for('view_analysis_results', app_id=app_id)
+    elif job['status'] == 'failed':
+        response['error'] = job['error']
+    
+    return jsonify(response)
 
 @app.route('/application/<int:app_id>/analysis')
 @login_required
@@ -865,6 +923,32 @@ def admin_analytics():
                          analytics=analytics, 
                          selected_days=days)
 
+@app.route('/admin/analytics/stage-timings')
+@login_required
+def admin_stage_timings():
+    """Per-stage document analysis timing histograms as JSON"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    admin_manager = AdminManager()
+    days = int(request.args.get('days', 30))
+    document_type = request.args.get('document_type')
+    
+    return jsonify({
+        'days': days,
+        'document_type': document_type,
+        'stages': admin_manager.get_stage_timing_report(days, document_type)
+    })
+
+@app.route('/admin/uploads/collect-garbage', methods=['POST'])
+@login_required
+def collect_upload_garbage():
+    """Remove unreferenced upload blobs and files left by failed uploads"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    return jsonify({'removed_files': upload_store.collect_garbage()})
+
 @app.route('/admin/export/applications')
 @login_required
 def export_applications():
@@ -1171,44 +1255,50 @@ def update_application(app_id):
         
         # Handle new file uploads
         uploaded_files = []
+        new_documents = []
         document_types = ['transcript', 'sop', 'resume', 'passport', 'test_scores', 'recommendation_letters']
         
         for doc_type in document_types:
             files = request.files.getlist(f'{doc_type}[]')
             for file in files:
                 if file and file.filename != '' and allowed_file(file.filename):
-                    # Generate unique filename
                     original_filename = secure_filename(file.filename)
                     file_extension = original_filename.rsplit('.', 1)[1].lower()
-                    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-                    
-                    # Create subdirectory for this application (if it doesn't exist)
-                    app_upload_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(app_id))
-                    os.makedirs(app_upload_dir, exist_ok=True)
-                    
-                    file_path = os.path.join(app_upload_dir, unique_filename)
-                    file.save(file_path)
                     
-                    # Get file info
-                    file_size = os.path.getsize(file_path)
-                    mime_type = mimetypes.guess_type(file_path)[0]
+                    # Store by content hash (computed while streaming to disk) so identical
+                    # uploads across applications share one file
+                    content_hash, file_path, file_size = upload_store.save(file, file_extension, cursor)
+                    stored_filename = os.path.basename(file_path)
+                    mime_type = mimetypes.guess_type(original_filename)[0]
                     
                     # Save document record
                     cursor.execute('''
                         INSERT INTO documents (
                             application_id, document_type, original_filename,
-                            stored_filename, file_path, file_size, mime_type
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                            stored_filename, file_path, file_size, mime_type, content_hash
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                     ''', (
                         app_id, doc_type, original_filename,
-                        unique_filename, file_path, file_size, mime_type
+                        stored_filename, file_path, file_size, mime_type, content_hash
                     ))
                     
                     uploaded_files.append({'type': doc_type, 'filename': original_filename})
+                    new_documents.append({
+                        'id': cursor.lastrowid,
+                        'document_type': doc_type,
+                        'original_filename': original_filename,
+                        'stored_filename': stored_filename,
+                        'file_path': file_path,
+                        'mime_type': mime_type,
+                        'content_hash': content_hash
+                    })
         
         conn.commit()
         conn.close()
         
+        # Start OCR/extraction now so a later analysis only has to compare against the form
+        start_preanalysis(app_id, new_documents)
+        
         flash(f'Application updated successfully! {len(uploaded_files)} new documents added.')
         return redirect(url_for('view_application_details', app_id=app_id))
         
@@ -1225,7 +1315,7 @@ def delete_document(doc_id):
     
     # Get document info and verify ownership
     cursor.execute('''
-        SELECT d.application_id, d.file_path, a.user_id, a.status
+        SELECT d.application_id, d.file_path, a.user_id, a.status, d.content_hash
         FROM documents d
         JOIN applications a ON d.application_id = a.id
         WHERE d.id = ?
@@ -1237,7 +1327,7 @@ def delete_document(doc_id):
         flash('Document not found!')
         return redirect(url_for('view_applications'))
     
-    app_id, file_path, user_id, status = result
+    app_id, file_path, user_id, status, content_hash = result
     
     # Check permissions
     if current_user.role == 'student' and user_id != current_user.id:
@@ -1249,12 +1339,16 @@ def delete_document(doc_id):
         return redirect(url_for('view_application_details', app_id=app_id))
     
     try:
-        # Delete file from filesystem
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
         # Delete record from database
         cursor.execute('DELETE FROM documents WHERE id = ?', (doc_id,))
+        
+        if content_hash:
+            # Shared blob: only removed once no other document references it
+            upload_store.release(content_hash, cursor)
+        elif os.path.exists(file_path):
+            # Uploaded before content-addressed storage
+            os.remove(file_path)
+        
         conn.commit()
         
         flash('Document deleted successfully!')
@@ -1270,4 +1364,11 @@ def delete_document(doc_id):
 
 if __name__ == '__main__':
     init_db()
+    upload_store.initialize_table()
+    # Blobs and temp files leaked by uploads that rolled back or crashed before the last shutdown
+    removed = upload_store.collect_garbage()
+    if removed:
+        print(f"Removed {removed} stray upload files")
+    analysis_queue.initialize_tables()
+    analysis_queue.fail_interrupted_jobs()
     app.run(debug=True)
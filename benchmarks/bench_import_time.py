@@ -0,0 +1,63 @@
+"""Measure the cost of importing the app with lazy and eager heavy imports.
+
+Usage:
+    python benchmarks/bench_import_time.py [--module app] [--repeat 5]
+
+Each run imports the module in a fresh interpreter, once with the OCR/NLP
+dependencies deferred (the default) and once with EAGER_IMPORTS=1, and
+reports wall time and peak RSS of the child process.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+import lazy_imports
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "loaded": lazy_imports.loaded_modules(),
+}}))
+'''
+
+def measure(module: str, eager: bool):
+    env = dict(os.environ, EAGER_IMPORTS='1' if eager else '0')
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD.format(module=module)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'import failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app', help='module to import (default: app)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'median ms':>10} {'min ms':>10} {'peak RSS MB':>12}  modules loaded")
+    for eager in (False, True):
+        try:
+            runs = [measure(args.module, eager) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{'eager' if eager else 'lazy':<8} failed: {e}")
+            continue
+
+        times = [run['seconds'] * 1000 for run in runs]
+        rss = max(run['max_rss_kb'] for run in runs) / 1024
+        loaded = ', '.join(runs[-1]['loaded']) or '-'
+        print(f"{'eager' if eager else 'lazy':<8} {statistics.median(times):>10.1f} "
+              f"{min(times):>10.1f} {rss:>12.1f}  {loaded}")
+
+if __name__ == '__main__':
+    main()
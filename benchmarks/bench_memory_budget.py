@@ -0,0 +1,97 @@
+"""Check that memory-bounded extraction stays under its per-worker budget.
+
+Usage:
+    python benchmarks/bench_memory_budget.py [--pages 40] [--budget-mb 600] [pdf]
+
+Without a PDF, a large synthetic "scanned" PDF is rendered (every page is a
+full-page image with no text layer, so each one goes through OCR). The file
+is extracted in a fresh interpreter with and without the budget, and the
+peak RSS of each run is reported. Exits non-zero if the bounded run goes
+over budget.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHILD = '''
+import json, sys, time
+from document_processor import DocumentProcessor, warm_up
+from memory_budget import peak_rss_bytes
+warm_up()
+budget = {budget}
+processor = DocumentProcessor(pdf_workers=1, ocr_dpi=300, memory_budget_mb=budget)
+start = time.perf_counter()
+text = processor.extract_text_from_pdf({path!r})
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "chars": len(text),
+    "peak_rss_mb": peak_rss_bytes() / (1024 * 1024),
+}}))
+'''
+
+def render_scanned_pdf(path: str, pages: int):
+    """Write a PDF whose pages are large grayscale scans of score-report text"""
+    import fitz
+    import numpy as np
+    from PIL import Image, ImageDraw
+    import io
+
+    doc = fitz.open()
+    rng = np.random.default_rng(0)
+    for number in range(pages):
+        # A4 at 300 DPI
+        img = Image.new('L', (2480, 3508), color=245)
+        draw = ImageDraw.Draw(img)
+        for row in range(60):
+            draw.text((150, 150 + row * 52), f"Page {number} line {row}: GPA 3.{row % 10} TOEFL {90 + row % 30}", fill=10)
+        noise = rng.integers(0, 25, size=(3508, 2480), dtype=np.uint8)
+        img = Image.fromarray(np.clip(np.asarray(img, dtype=np.int16) - noise, 0, 255).astype(np.uint8))
+
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+    doc.save(path, deflate=True)
+    doc.close()
+
+def measure(path: str, budget_mb):
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD.format(budget=budget_mb, path=path)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'extraction failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdf', nargs='?', help='PDF to extract (default: render a synthetic one)')
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--budget-mb', type=int, default=600)
+    args = parser.parse_args()
+
+    path = args.pdf
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), 'scanned.pdf')
+        render_scanned_pdf(path, args.pages)
+    print(f"{path}: {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+
+    unbounded = measure(path, None)
+    bounded = measure(path, args.budget_mb)
+
+    for label, run in (('unbounded', unbounded), (f'budget {args.budget_mb} MB', bounded)):
+        print(f"{label:<16} peak RSS {run['peak_rss_mb']:8.1f} MB  {run['seconds']:7.1f}s  {run['chars']} chars")
+
+    if bounded['peak_rss_mb'] > args.budget_mb:
+        print(f"FAIL: bounded run peaked at {bounded['peak_rss_mb']:.1f} MB (budget {args.budget_mb} MB)")
+        sys.exit(1)
+    print("OK: bounded run stayed under budget")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Compare OCR backends on the same image set.
+
+Usage:
+    python benchmarks/bench_ocr_backends.py [image ...] [--count 20] [--repeat 3]
+
+Without image paths a set of synthetic score-report images is rendered with PIL.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw
+
+from document_processor import DocumentProcessor, OCR_ENGINES
+
+def render_synthetic_images(count: int):
+    """Render simple score-report style images"""
+    images = []
+    for i in range(count):
+        img = Image.new('L', (1200, 600), color=255)
+        draw = ImageDraw.Draw(img)
+        lines = [
+            f"Student Name: Test Applicant {i}",
+            f"Email: applicant{i}@example.com",
+            f"GPA: {3.0 + (i % 10) / 10:.1f}",
+            f"GRE: {300 + i % 40}",
+            f"TOEFL: {90 + i % 30}",
+        ]
+        for row, line in enumerate(lines):
+            draw.text((40, 40 + row * 60), line, fill=0)
+        images.append(np.array(img))
+    return images
+
+def load_images(paths):
+    """Load and preprocess images the same way DocumentProcessor does"""
+    processor = DocumentProcessor(ocr_backend='pytesseract')
+    images = []
+    for path in paths:
+        processed = processor.preprocess_image(path)
+        if processed is None:
+            processed = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if processed is not None:
+            images.append(processed)
+    return images
+
+def bench_backend(name, images, repeat):
+    """Time one backend, including the cost of creating its engine"""
+    start = time.perf_counter()
+    engine = OCR_ENGINES[name]()
+    setup_time = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeat):
+        for image in images:
+            start = time.perf_counter()
+            engine.image_to_string(image, psm=6)
+            latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        'setup_ms': setup_time * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        'images_per_sec': len(latencies) / sum(latencies)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='*', help='Image files to OCR')
+    parser.add_argument('--count', type=int, default=20, help='Synthetic images to render when no paths are given')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the image set per backend')
+    args = parser.parse_args()
+
+    images = load_images(args.images) if args.images else render_synthetic_images(args.count)
+    print(f"Benchmarking {len(images)} images x {args.repeat} passes\n")
+    print(f"{'backend':<12} {'setup ms':>10} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'img/s':>8}")
+
+    for name in OCR_ENGINES:
+        try:
+            result = bench_backend(name, images, args.repeat)
+        except (ImportError, OSError, RuntimeError) as e:
+            print(f"{name:<12} unavailable: {e}")
+            continue
+        print(f"{name:<12} {result['setup_ms']:>10.1f} {result['mean_ms']:>10.1f} "
+              f"{result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f} {result['images_per_sec']:>8.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""Benchmark the document pipeline on synthetic fixtures and compare with a baseline.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--repeat 5] [--output results.json]
+                                        [--baseline baseline.json] [--tolerance 0.15]
+
+Fixtures are rendered locally from a fixed seed: text-layer PDFs,
+scanned-style PDFs, and noisy JPEG/PNG score reports at several sizes. The
+suite measures latency percentiles and throughput for
+DocumentProcessor.extract_text_from_document, extract_structured_data and
+DocumentAnalyzer.analyze_application_documents.
+
+--output writes machine-readable results. With --baseline, every benchmark
+is compared with the stored run by its median, and the script exits
+non-zero when any benchmark is slower by more than --tolerance. Save a
+run's --output as the new baseline after an intentional change.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_fixtures import APPLICANT, FIXTURE_VERSION, generate_fixtures
+from document_processor import DocumentAnalyzer, DocumentProcessor, warm_up
+
+def summarize(latencies, pages_per_call=1):
+    """Latency percentiles (ms) and throughput for a list of per-call seconds"""
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))] * 1000
+
+    total = sum(ordered) or 1e-9
+    return {
+        'calls': len(ordered),
+        'mean_ms': round(total / len(ordered) * 1000, 3),
+        'p50_ms': round(percentile(50), 3),
+        'p90_ms': round(percentile(90), 3),
+        'p99_ms': round(percentile(99), 3),
+        'docs_per_sec': round(len(ordered) / total, 3),
+        'pages_per_sec': round(len(ordered) * pages_per_call / total, 3),
+    }
+
+def time_calls(func, repeat, warmup):
+    for _ in range(warmup):
+        func()
+    latencies = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+    return latencies, result
+
+def environment(args):
+    versions = {}
+    for module in ('fitz', 'cv2', 'numpy', 'pytesseract', 'spacy', 'PIL'):
+        try:
+            imported = __import__(module)
+            versions[module] = getattr(imported, '__version__', getattr(imported, 'VersionBind', 'unknown'))
+        except ImportError:
+            versions[module] = None
+    try:
+        import pytesseract
+        versions['tesseract'] = str(pytesseract.get_tesseract_version())
+    except Exception:
+        versions['tesseract'] = None
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'fixture_version': FIXTURE_VERSION,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'ocr_backend': args.ocr_backend,
+        'versions': versions,
+    }
+
+def run_suite(args):
+    fixtures = generate_fixtures(args.fixtures_dir, seed=args.seed)
+    if args.only:
+        fixtures = [fixture for fixture in fixtures if fixture['kind'] in args.only]
+
+    warm_up(args.ocr_backend)
+    processor = DocumentProcessor(pdf_workers=args.pdf_workers, ocr_backend=args.ocr_backend)
+    results = {}
+
+    texts = {}
+    for fixture in fixtures:
+        latencies, text = time_calls(
+            lambda: processor.extract_text_from_document(fixture['path'], fixture['mime_type']),
+            args.repeat, args.warmup
+        )
+        texts[fixture['name']] = text
+        results[f"extract_text_from_document/{fixture['name']}"] = summarize(latencies, fixture['pages'])
+        print_row(f"extract_text_from_document/{fixture['name']}", results)
+
+    # Regex + NER are cheap, so give them more calls for stable percentiles
+    for fixture in fixtures:
+        text = texts[fixture['name']]
+        latencies, _ = time_calls(
+            lambda: processor.extract_structured_data(text, fixture['document_type']),
+            args.repeat * 10, args.warmup
+        )
+        results[f"extract_structured_data/{fixture['name']}"] = summarize(latencies, fixture['pages'])
+        print_row(f"extract_structured_data/{fixture['name']}", results)
+
+    # One application per run with one document of each kind
+    by_kind = {}
+    for fixture in fixtures:
+        by_kind.setdefault(fixture['kind'], fixture)
+    documents = [
+        {'document_type': fixture['document_type'], 'original_filename': os.path.basename(fixture['path']),
+         'stored_filename': os.path.basename(fixture['path']), 'file_path': fixture['path'],
+         'mime_type': fixture['mime_type']}
+        for fixture in by_kind.values()
+    ]
+    if documents:
+        analyzer = DocumentAnalyzer(use_cache=False, incremental=False)
+        analyzer.processor = processor
+        pages = sum(fixture['pages'] for fixture in by_kind.values())
+        latencies, _ = time_calls(
+            lambda: analyzer.analyze_application_documents(0, documents, dict(APPLICANT)),
+            args.repeat, args.warmup
+        )
+        results['analyze_application_documents/mixed'] = summarize(latencies, pages / len(documents))
+        results['analyze_application_documents/mixed']['documents'] = len(documents)
+        print_row('analyze_application_documents/mixed', results)
+
+    return results
+
+def print_row(name, results):
+    result = results[name]
+    print(f"{name:<56} {result['p50_ms']:>10.1f} {result['p90_ms']:>10.1f} {result['p99_ms']:>10.1f} "
+          f"{result['docs_per_sec']:>9.2f} {result['pages_per_sec']:>9.2f}")
+
+def compare(results, baseline, tolerance):
+    """Print median ratios against the baseline; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<56} {'base p50':>10} {'p50':>10} {'ratio':>7}")
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            print(f"{name:<56} {'-':>10} {result['p50_ms']:>10.1f}     new")
+            continue
+        ratio = result['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 1.0
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = '  SLOWER'
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            flag = '  faster'
+        print(f"{name:<56} {base['p50_ms']:>10.1f} {result['p50_ms']:>10.1f} {ratio:>7.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures-dir', default=os.path.join(tempfile.gettempdir(), 'ai-analyzer-bench-fixtures'))
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--pdf-workers', type=int, default=1)
+    parser.add_argument('--ocr-backend', default='auto')
+    parser.add_argument('--only', nargs='*', help='fixture kinds to run (text_pdf, scanned_pdf, jpg, png)')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed slowdown of the median (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<56} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'docs/s':>9} {'pages/s':>9}")
+    run = {'environment': environment(args), 'results': run_suite(args)}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(run['results'], baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
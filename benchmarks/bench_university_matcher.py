@@ -0,0 +1,143 @@
+"""Benchmark UniversityMatcher.find_matching_universities on large synthetic catalogs.
+
+Usage:
+    python benchmarks/bench_university_matcher.py [--rows 1000 10000 100000] [--repeat 50]
+
+Each catalog has the given number of university/program rows. The
+vectorized matcher is timed against the per-university Python loop it
+replaced (copied below), and both must return the same matches.
+Catalog construction is reported separately, because it happens once per
+process rather than once per query.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_recommender import UniversityMatcher
+from university_catalog import UniversityCatalog
+
+PROGRAMS = ['Computer Science', 'Data Science', 'Electrical Engineering', 'Mechanical Engineering',
+            'Business Administration', 'Finance', 'Economics', 'Physics', 'Mathematics', 'Biology',
+            'Medicine', 'Public Health', 'Law', 'Architecture', 'Design', 'Arts', 'Psychology',
+            'Chemistry', 'Civil Engineering', 'Information Systems']
+COUNTRIES = ['USA', 'Canada', 'UK', 'Germany', 'Australia', 'Netherlands', 'Singapore', 'Japan']
+
+def synthetic_universities(rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    universities = []
+    remaining = rows
+    while remaining > 0:
+        count = min(remaining, rng.randint(1, 8))
+        universities.append({
+            'name': f'University {len(universities):06d}',
+            'country': rng.choice(COUNTRIES),
+            'ranking': rng.randint(20, 100),
+            'min_gpa': round(rng.uniform(2.5, 3.9), 1),
+            'min_gre': rng.randint(295, 330),
+            'min_toefl': rng.randint(75, 110),
+            'programs': rng.sample(PROGRAMS, count),
+            'acceptance_rate': round(rng.uniform(3, 80), 1),
+            'tuition': rng.randint(8000, 60000)
+        })
+        remaining -= count
+    return universities
+
+def loop_match(universities, profile, limit=5):
+    """The original per-university loop, kept as the reference implementation"""
+    matches = []
+    student_gpa = float(profile.get('gpa', 0))
+    student_gre = int(profile.get('gre_score', 0))
+    student_toefl = int(profile.get('toefl_score', 0))
+    target_program = profile.get('course', '').lower()
+
+    for uni in universities:
+        match_score = 0
+        reasons = []
+        if student_gpa >= uni['min_gpa']:
+            match_score += 25
+            reasons.append(f"GPA ({student_gpa}) meets requirement ({uni['min_gpa']})")
+        elif student_gpa >= uni['min_gpa'] - 0.3:
+            match_score += 15
+            reasons.append(f"GPA ({student_gpa}) close to requirement ({uni['min_gpa']})")
+        if student_gre >= uni['min_gre']:
+            match_score += 25
+            reasons.append(f"GRE ({student_gre}) meets requirement ({uni['min_gre']})")
+        elif student_gre >= uni['min_gre'] - 15:
+            match_score += 15
+            reasons.append(f"GRE ({student_gre}) close to requirement ({uni['min_gre']})")
+        if student_toefl >= uni['min_toefl']:
+            match_score += 25
+            reasons.append(f"TOEFL ({student_toefl}) meets requirement ({uni['min_toefl']})")
+        elif student_toefl >= uni['min_toefl'] - 10:
+            match_score += 15
+            reasons.append(f"TOEFL ({student_toefl}) close to requirement ({uni['min_toefl']})")
+        if any(target_program in prog.lower() for prog in uni['programs']):
+            match_score += 25
+            reasons.append(f"Offers {target_program} program")
+        if match_score > 40:
+            matches.append({'university': uni, 'match_score': match_score, 'match_reasons': reasons})
+
+    matches.sort(key=lambda x: x['match_score'], reverse=True)
+    return matches[:limit]
+
+def percentile_ms(latencies, p):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))] * 1000
+
+def time_queries(func, profiles, repeat):
+    latencies = []
+    for i in range(repeat):
+        profile = profiles[i % len(profiles)]
+        start = time.perf_counter()
+        func(profile)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='*', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--skip-loop', action='store_true', help='only time the vectorized matcher')
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    profiles = [
+        {'gpa': round(rng.uniform(2.8, 4.0), 2), 'gre_score': rng.randint(295, 335),
+         'toefl_score': rng.randint(80, 118), 'course': rng.choice(['computer science', 'engineering', 'law', 'arts'])}
+        for _ in range(20)
+    ]
+
+    print(f"{'rows':>8} {'build ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'loop p50':>9} {'speedup':>8}")
+    for rows in args.rows:
+        universities = synthetic_universities(rows)
+
+        start = time.perf_counter()
+        matcher = UniversityMatcher(UniversityCatalog(universities))
+        build_ms = (time.perf_counter() - start) * 1000
+
+        latencies = time_queries(lambda p: matcher.find_matching_universities(p, args.limit), profiles, args.repeat)
+        p50 = percentile_ms(latencies, 50)
+        line = f"{rows:>8} {build_ms:>9.1f} {p50:>9.3f} {percentile_ms(latencies, 99):>9.3f}"
+
+        if not args.skip_loop:
+            for profile in profiles:
+                expected = [(m['university']['name'], m['match_score'], m['match_reasons'])
+                            for m in loop_match(universities, profile, args.limit)]
+                actual = [(m['university']['name'], m['match_score'], m['match_reasons'])
+                          for m in matcher.find_matching_universities(profile, args.limit)]
+                if expected != actual:
+                    print(f"MISMATCH at {rows} rows for {profile}")
+                    sys.exit(1)
+            loop_latencies = time_queries(lambda p: loop_match(universities, p, args.limit), profiles,
+                                          max(5, args.repeat // 10))
+            loop_p50 = percentile_ms(loop_latencies, 50)
+            line += f" {loop_p50:>9.3f} {loop_p50 / p50:>7.1f}x"
+        print(line)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Deterministic synthetic documents for the pipeline benchmarks.
+
+Fixtures are rendered from a fixed seed, so two runs (or two machines)
+benchmark byte-identical inputs. Each fixture is described by a dict with
+its path, mime type, document type, kind and size.
+"""
+import io
+import json
+import os
+import random
+from typing import Dict, List
+
+import fitz
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+# Bump when rendering changes so stale fixture directories are regenerated
+FIXTURE_VERSION = 1
+
+IMAGE_SIZES = {
+    'small': (1000, 700),
+    'medium': (2000, 1400),
+    'large': (4000, 2800),
+}
+
+APPLICANT = {
+    'full_name': 'Jordan Avery Smith',
+    'email': 'jordan.smith@example.com',
+    'phone': '+14155550123',
+    'gpa': 3.7,
+    'gre_score': 321,
+    'toefl_score': 108,
+    'ielts_score': 7.5,
+}
+
+def report_lines(rng: random.Random, index: int, filler_lines: int = 20) -> List[str]:
+    """Score-report text with the applicant's fields among filler lines"""
+    fields = [
+        f"Student Name: {APPLICANT['full_name']}",
+        f"Email: {APPLICANT['email']}",
+        f"Phone: {APPLICANT['phone']}",
+        f"Cumulative GPA: {APPLICANT['gpa']}",
+        f"GRE: {APPLICANT['gre_score']}",
+        f"TOEFL: {APPLICANT['toefl_score']}",
+        f"IELTS: {APPLICANT['ielts_score']}",
+        f"Issued: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+    ]
+    words = ['course', 'credits', 'semester', 'analysis', 'laboratory', 'seminar', 'grade', 'honors']
+    filler = [
+        f"{index:03d}-{row:02d} " + ' '.join(rng.choice(words) for _ in range(8))
+        for row in range(filler_lines)
+    ]
+    # Fields sit near the end so early-exit and region OCR have something to find
+    return filler + fields
+
+def render_report_image(size, rng: random.Random, index: int, noise: int = 30, skew: float = 2.0) -> Image.Image:
+    """A grayscale photo-like score report: text, blur, sensor noise and a slight rotation"""
+    width, height = size
+    img = Image.new('L', size, color=235)
+    draw = ImageDraw.Draw(img)
+
+    lines = report_lines(rng, index, filler_lines=max(5, height // 120))
+    step = max(14, (height - 80) // (len(lines) + 1))
+    for row, line in enumerate(lines):
+        draw.text((width // 20, 40 + row * step), line, fill=20)
+
+    img = img.rotate(rng.uniform(-skew, skew), fillcolor=235, expand=False)
+    img = img.filter(ImageFilter.GaussianBlur(radius=0.6))
+
+    np_rng = np.random.default_rng(index)
+    pixels = np.asarray(img, dtype=np.int16) + np_rng.integers(-noise, noise + 1, size=(height, width))
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+def write_text_pdf(path: str, rng: random.Random, pages: int):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page(width=595, height=842)
+        text = '\n'.join(report_lines(rng, number, filler_lines=40))
+        page.insert_textbox(fitz.Rect(50, 50, 545, 800), text, fontsize=9)
+    doc.save(path, deflate=True)
+    doc.close()
+
+def write_scanned_pdf(path: str, rng: random.Random, pages: int):
+    doc = fitz.open()
+    for number in range(pages):
+        img = render_report_image((1654, 2339), rng, number)  # A4 at 200 DPI
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+    doc.save(path, deflate=True)
+    doc.close()
+
+def generate_fixtures(directory: str, seed: int = 1234, pdf_pages=(1, 10), scanned_pages=(1, 3)) -> List[Dict]:
+    """Render every fixture into directory (reusing it if the manifest matches) and return the manifest"""
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, 'manifest.json')
+    settings = {'version': FIXTURE_VERSION, 'seed': seed,
+                'pdf_pages': list(pdf_pages), 'scanned_pages': list(scanned_pages)}
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('settings') == settings and all(os.path.exists(item['path']) for item in manifest['fixtures']):
+            return manifest['fixtures']
+
+    rng = random.Random(seed)
+    fixtures = []
+
+    for pages in pdf_pages:
+        path = os.path.join(directory, f'text_{pages}p.pdf')
+        write_text_pdf(path, rng, pages)
+        fixtures.append({'name': f'text_pdf_{pages}p', 'kind': 'text_pdf', 'pages': pages, 'path': path,
+                         'mime_type': 'application/pdf', 'document_type': 'transcript'})
+
+    for pages in scanned_pages:
+        path = os.path.join(directory, f'scanned_{pages}p.pdf')
+        write_scanned_pdf(path, rng, pages)
+        fixtures.append({'name': f'scanned_pdf_{pages}p', 'kind': 'scanned_pdf', 'pages': pages, 'path': path,
+                         'mime_type': 'application/pdf', 'document_type': 'transcript'})
+
+    for label, size in IMAGE_SIZES.items():
+        img = render_report_image(size, rng, len(fixtures))
+        for fmt, ext, mime in (('JPEG', 'jpg', 'image/jpeg'), ('PNG', 'png', 'image/png')):
+            path = os.path.join(directory, f'report_{label}.{ext}')
+            img.save(path, format=fmt, **({'quality': 85} if fmt == 'JPEG' else {}))
+            fixtures.append({'name': f'{ext}_{label}', 'kind': ext, 'pages': 1, 'path': path,
+                             'mime_type': mime, 'document_type': 'test_scores'})
+
+    with open(manifest_path, 'w') as f:
+        json.dump({'settings': settings, 'fixtures': fixtures}, f, indent=2)
+    return fixtures
@@ -1,26 +1,337 @@
-import fitz  # PyMuPDF
-import pytesseract
-from PIL import Image
-import cv2
-import numpy as np
-import spacy
+from __future__ import annotations
+
 import re
 import os
-from typing import Dict, List, Tuple, Optional
+import hashlib
+import json
+import ctypes
+import ctypes.util
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Optional, Iterator
+from lazy_imports import lazy_import, load_all
+from extraction_cache import ExtractionCache, file_sha256
+from document_state import DocumentStateStore
+from image_preprocessor import ImagePreprocessor
+from field_scanner import get_field_scanner
+from word_extractor import iter_docx_text, extract_doc_text
+from memory_budget import MemoryBudget
+from stage_timer import StageTimer
+import nlp_models
+
+# Heavy OCR/imaging dependencies are imported on first use
+fitz = lazy_import('fitz')  # PyMuPDF
+pytesseract = lazy_import('pytesseract')
+Image = lazy_import('PIL.Image')
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+def warm_up(ocr_backend: str = 'auto'):
+    """Load OCR/NLP dependencies and models now instead of on the first document"""
+    load_all()
+    nlp_models.get_nlp()
+    get_ocr_engine(ocr_backend)
+
+def _extract_pdf_page_range(processor: 'DocumentProcessor', file_path: str, start: int, end: int) -> List[str]:
+    """Extract text for pages [start, end) in a worker process with its own document handle"""
+    doc = fitz.open(file_path)
+    try:
+        return [processor._extract_page_text(doc.load_page(page_num)) for page_num in range(start, end)]
+    finally:
+        doc.close()
+
+class OCREngine:
+    """Interface for OCR backends used by DocumentProcessor"""
+    
+    name = 'base'
+    
+    def image_to_string(self, image: np.ndarray, psm: int = 6) -> str:
+        """Recognize text in a grayscale or BGR image"""
+        raise NotImplementedError
+    
+    def image_to_words(self, image: np.ndarray, psm: int = 11) -> List[Tuple[str, int, int, int, int]]:
+        """Recognize words with their (text, x, y, width, height) boxes"""
+        raise NotImplementedError
 
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("Please install the spaCy English model: python -m spacy download en_core_web_sm")
-    nlp = None
+class PytesseractEngine(OCREngine):
+    """Runs the tesseract CLI per image (temp file + process spawn)"""
+    
+    name = 'pytesseract'
+    
+    def image_to_string(self, image: np.ndarray, psm: int = 6) -> str:
+        return pytesseract.image_to_string(image, config=f'--psm {psm}')
+    
+    def image_to_words(self, image: np.ndarray, psm: int = 11) -> List[Tuple[str, int, int, int, int]]:
+        data = pytesseract.image_to_data(image, config=f'--psm {psm}', output_type=pytesseract.Output.DICT)
+        return [
+            (text, data['left'][i], data['top'][i], data['width'][i], data['height'][i])
+            for i, text in enumerate(data['text']) if text.strip()
+        ]
+
+class TesserocrEngine(OCREngine):
+    """Long-lived tesserocr API handle, so language data is loaded once per process"""
+    
+    name = 'tesserocr'
+    
+    def __init__(self, lang='eng'):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._api = tesserocr.PyTessBaseAPI(lang=lang)
+        self._lock = threading.Lock()
+    
+    def image_to_string(self, image: np.ndarray, psm: int = 6) -> str:
+        with self._lock:
+            self._api.SetPageSegMode(psm)
+            self._api.SetImage(Image.fromarray(image))
+            return self._api.GetUTF8Text()
+    
+    def image_to_words(self, image: np.ndarray, psm: int = 11) -> List[Tuple[str, int, int, int, int]]:
+        level = self._tesserocr.RIL.WORD
+        words = []
+        with self._lock:
+            self._api.SetPageSegMode(psm)
+            self._api.SetImage(Image.fromarray(image))
+            self._api.Recognize()
+            for word in self._tesserocr.iterate_level(self._api.GetIterator(), level):
+                text = word.GetUTF8Text(level)
+                box = word.BoundingBox(level)
+                if text and text.strip() and box:
+                    left, top, right, bottom = box
+                    words.append((text, left, top, right - left, bottom - top))
+        return words
+
+class TesseractCAPIEngine(OCREngine):
+    """Long-lived handle on libtesseract's C API through ctypes"""
+    
+    name = 'capi'
+    
+    def __init__(self, lang='eng', library_path=None):
+        library_path = library_path or ctypes.util.find_library('tesseract')
+        if not library_path:
+            raise OSError("libtesseract not found")
+        
+        lib = ctypes.CDLL(library_path)
+        lib.TessBaseAPICreate.restype = ctypes.c_void_p
+        lib.TessBaseAPIInit3.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPIInit3.restype = ctypes.c_int
+        lib.TessBaseAPISetPageSegMode.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.TessBaseAPISetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int
+        ]
+        lib.TessBaseAPIGetUTF8Text.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIClear.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIRecognize.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        lib.TessBaseAPIRecognize.restype = ctypes.c_int
+        lib.TessBaseAPIGetIterator.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIGetIterator.restype = ctypes.c_void_p
+        lib.TessResultIteratorGetPageIterator.argtypes = [ctypes.c_void_p]
+        lib.TessResultIteratorGetPageIterator.restype = ctypes.c_void_p
+        lib.TessResultIteratorGetUTF8Text.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.TessResultIteratorGetUTF8Text.restype = ctypes.c_void_p
+        lib.TessPageIteratorBoundingBox.argtypes = [ctypes.c_void_p, ctypes.c_int] + [ctypes.POINTER(ctypes.c_int)] * 4
+        lib.TessPageIteratorBoundingBox.restype = ctypes.c_int
+        lib.TessResultIteratorNext.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.TessResultIteratorNext.restype = ctypes.c_int
+        lib.TessResultIteratorDelete.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIDelete.argtypes = [ctypes.c_void_p]
+        
+        self._lib = lib
+        self._handle = lib.TessBaseAPICreate()
+        if lib.TessBaseAPIInit3(self._handle, None, lang.encode()) != 0:
+            lib.TessBaseAPIDelete(self._handle)
+            raise OSError(f"Could not initialize Tesseract for language '{lang}'")
+        self._lock = threading.Lock()
+    
+    def image_to_string(self, image: np.ndarray, psm: int = 6) -> str:
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        
+        with self._lock:
+            self._lib.TessBaseAPISetPageSegMode(self._handle, psm)
+            self._lib.TessBaseAPISetImage(
+                self._handle, image.ctypes.data, width, height,
+                bytes_per_pixel, width * bytes_per_pixel
+            )
+            text_ptr = self._lib.TessBaseAPIGetUTF8Text(self._handle)
+            try:
+                return ctypes.string_at(text_ptr).decode('utf-8', errors='replace') if text_ptr else ""
+            finally:
+                if text_ptr:
+                    self._lib.TessDeleteText(text_ptr)
+                self._lib.TessBaseAPIClear(self._handle)
+    
+    def image_to_words(self, image: np.ndarray, psm: int = 11) -> List[Tuple[str, int, int, int, int]]:
+        level = 3  # RIL_WORD
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        words = []
+        
+        with self._lock:
+            self._lib.TessBaseAPISetPageSegMode(self._handle, psm)
+            self._lib.TessBaseAPISetImage(
+                self._handle, image.ctypes.data, width, height,
+                bytes_per_pixel, width * bytes_per_pixel
+            )
+            if self._lib.TessBaseAPIRecognize(self._handle, None) != 0:
+                self._lib.TessBaseAPIClear(self._handle)
+                return words
+            
+            iterator = self._lib.TessBaseAPIGetIterator(self._handle)
+            if iterator:
+                page_iterator = self._lib.TessResultIteratorGetPageIterator(iterator)
+                box = [ctypes.c_int() for _ in range(4)]
+                while True:
+                    text_ptr = self._lib.TessResultIteratorGetUTF8Text(iterator, level)
+                    if text_ptr:
+                        text = ctypes.string_at(text_ptr).decode('utf-8', errors='replace')
+                        self._lib.TessDeleteText(text_ptr)
+                        if text.strip() and self._lib.TessPageIteratorBoundingBox(
+                                page_iterator, level, *[ctypes.byref(value) for value in box]):
+                            left, top, right, bottom = [value.value for value in box]
+                            words.append((text, left, top, right - left, bottom - top))
+                    if not self._lib.TessResultIteratorNext(iterator, level):
+                        break
+                self._lib.TessResultIteratorDelete(iterator)
+            
+            self._lib.TessBaseAPIClear(self._handle)
+        return words
+    
+    def __del__(self):
+        if getattr(self, '_handle', None):
+            self._lib.TessBaseAPIDelete(self._handle)
+            self._handle = None
+
+OCR_ENGINES = {
+    'tesserocr': TesserocrEngine,
+    'capi': TesseractCAPIEngine,
+    'pytesseract': PytesseractEngine
+}
+
+# One engine per backend per process; engines are not shared across processes
+_ocr_engines = {}
+_ocr_engines_lock = threading.Lock()
+
+def get_ocr_engine(backend: str = 'auto') -> OCREngine:
+    """Return this process's OCR engine, preferring in-process backends when backend='auto'"""
+    with _ocr_engines_lock:
+        if backend in _ocr_engines:
+            return _ocr_engines[backend]
+        
+        candidates = list(OCR_ENGINES) if backend == 'auto' else [backend]
+        engine = None
+        for name in candidates:
+            try:
+                engine = OCR_ENGINES[name]()
+                break
+            except (ImportError, OSError, RuntimeError) as e:
+                print(f"OCR backend '{name}' unavailable: {e}")
+        
+        if engine is None:
+            engine = PytesseractEngine()
+        
+        _ocr_engines[backend] = engine
+        return engine
 
 class DocumentProcessor:
-    def __init__(self, tesseract_path=None):
-        """Initialize document processor with optional Tesseract path"""
+    # Bump whenever extraction output changes so cached results are invalidated
+    PROCESSOR_VERSION = '6'
+
+    # Fields compare_with_form_data can verify against the form
+    VERIFIABLE_FIELDS = ['email', 'gpa', 'gre_score', 'toefl_score', 'ielts_score']
+
+    # Extraction settings per document type:
+    #   psm       - Tesseract page segmentation mode for full-page OCR
+    #   fields    - regex fields worth scanning for (None scans everything)
+    #   ner       - whether spaCy looks for names
+    #   max_chars - characters of text read and scanned (None reads the whole document)
+    #   ocr       - whether pages without a text layer are OCRed; types with no
+    #               VERIFIABLE_FIELDS to find skip it unless OCR is requested
+    DEFAULT_PROFILE = {'psm': 6, 'fields': None, 'ner': True, 'max_chars': None, 'ocr': True}
+    EXTRACTION_PROFILES = {
+        'transcript': {'psm': 6, 'fields': ['email', 'gpa', 'date'], 'ner': True,
+                       'max_chars': None, 'ocr': True},
+        'test_scores': {'psm': 6, 'fields': ['email', 'gre_score', 'toefl_score', 'ielts_score', 'date'],
+                        'ner': True, 'max_chars': 20000, 'ocr': True},
+        'passport': {'psm': 11, 'fields': ['date'], 'ner': True, 'max_chars': 3000, 'ocr': True},
+        'resume': {'psm': 3, 'fields': ['email', 'phone', 'gpa', 'gre_score', 'toefl_score', 'ielts_score', 'date'],
+                   'ner': True, 'max_chars': 20000, 'ocr': True},
+        'sop': {'psm': 3, 'fields': ['email', 'gpa', 'gre_score', 'toefl_score', 'ielts_score'],
+                'ner': False, 'max_chars': 20000, 'ocr': True},
+        # The email on a letter is the recommender's, so it isn't compared with the applicant's
+        'recommendation_letters': {'psm': 3, 'fields': ['phone', 'date'], 'ner': False,
+                                   'max_chars': 10000, 'ocr': False}
+    }
+
+    # Characters of leading text spaCy NER looks at for names
+    NER_CHAR_LIMIT = 1000
+
+    # Words from the low-resolution pass that mark a text block as worth full OCR
+    REGION_KEYWORDS = ('gpa', 'cgpa', 'grade', 'gre', 'toefl', 'ielts', 'score', 'total', 'name', 'email')
+    
+    # Scale of the quick keyword-spotting pass in region OCR
+    REGION_SCAN_SCALE = 0.5
+    
+    # Tail of the previous chunk rescanned so matches spanning chunk boundaries are found
+    STREAM_OVERLAP_CHARS = 64
+
+    def __init__(self, tesseract_path=None, pdf_workers=None, parallel_page_threshold=20,
+                 ocr_fallback=True, ocr_dpi=200, ocr_min_chars=25, ocr_backend='auto',
+                 preprocess_options: Optional[Dict] = None, region_ocr=False, max_ocr_regions=4,
+                 memory_budget_mb: Optional[int] = None):
+        """Initialize document processor with optional Tesseract path.
+
+        PDFs with at least ``parallel_page_threshold`` pages are split into page
+        ranges and extracted by ``pdf_workers`` processes (defaults to the CPU
+        count); smaller PDFs, or ``pdf_workers=1``, are extracted serially.
+
+        PDF pages whose text layer has fewer than ``ocr_min_chars`` characters
+        are rasterized at ``ocr_dpi`` and OCRed when ``ocr_fallback`` is set.
+
+        ``ocr_backend`` picks the OCR engine ('auto', 'tesserocr', 'capi' or
+        'pytesseract'); 'auto' uses a persistent in-process engine when one is
+        installed and falls back to pytesseract.
+
+        ``preprocess_options`` are passed to ImagePreprocessor to configure the
+        image pipeline (stages, decode size, target text height, ...).
+
+        With ``region_ocr`` enabled, a quick low-resolution pass locates
+        keywords (GPA, GRE, TOEFL, ...) and only the ``max_ocr_regions`` text
+        blocks nearest to them get full-quality OCR; pages without any hits
+        fall back to full-page OCR.
+
+        ``memory_budget_mb`` bounds the worker's resident memory: PDFs are
+        read one page at a time with MuPDF's caches released in between, OCR
+        renders and photo decodes are shrunk to fit the remaining headroom,
+        and preprocessing filters in place.
+        """
         if tesseract_path:
             pytesseract.pytesseract.tesseract_cmd = tesseract_path
         
+        self.pdf_workers = pdf_workers or os.cpu_count() or 1
+        self.parallel_page_threshold = parallel_page_threshold
+        self.ocr_fallback = ocr_fallback
+        self.ocr_dpi = ocr_dpi
+        self.ocr_min_chars = ocr_min_chars
+        self.ocr_backend = ocr_backend
+        self.preprocess_options = dict(preprocess_options or {})
+        self.memory_budget_mb = memory_budget_mb
+        self.memory_budget = MemoryBudget(memory_budget_mb) if memory_budget_mb else None
+        self.image_preprocessor = ImagePreprocessor(
+            **{'low_memory': self.memory_budget is not None, **self.preprocess_options}
+        )
+        self.region_ocr = region_ocr
+        self.max_ocr_regions = max_ocr_regions
+        # Set by DocumentAnalyzer to collect per-stage timings for the current document
+        self.timer: Optional[StageTimer] = None
+        # Extraction profile of the document being processed (see use_profile)
+        self.profile: Dict = dict(self.DEFAULT_PROFILE)
+        
         # Common patterns for data extraction
         self.patterns = {
             'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
@@ -31,108 +342,498 @@ class DocumentProcessor:
             'ielts_score': r'(?:IELTS|International English)[:\s]*([0-9]\.?[0-9]?)',
             'date': r'\b(?:[0-3]?[0-9][/-][0-1]?[0-9][/-](?:[0-9]{2})?[0-9]{2})\b'
         }
+        
+        # Lowercase triggers that every match of a pattern touches (see FieldScanner)
+        self.pattern_triggers = {
+            'email': ('@', 'before', r'[a-z0-9._%+-]'),
+            'phone': (r'[+0-9][+0-9/-]*', 'within'),
+            'gpa': ('gpa|cgpa|grade point average', 'start'),
+            'gre_score': ('gre|graduate record examination', 'start'),
+            'toefl_score': ('toefl|test of english', 'start'),
+            'ielts_score': ('ielts|international english', 'start'),
+            'date': (r'[+0-9][+0-9/-]*', 'within')
+        }
+
+    @property
+    def cache_version(self) -> str:
+        """Version string for cache keys: PROCESSOR_VERSION plus a digest of the settings that change the output"""
+        settings = {
+            'ocr_fallback': self.ocr_fallback,
+            'ocr_dpi': self.ocr_dpi,
+            'ocr_min_chars': self.ocr_min_chars,
+            'ocr_backend': self.ocr_backend,
+            'preprocess_options': self.preprocess_options,
+            'region_ocr': self.max_ocr_regions if self.region_ocr else None,
+            # A budget shrinks renders and decodes, so bounded workers' text isn't served to unbounded ones
+            'memory_budget_mb': self.memory_budget_mb,
+        }
+        digest = hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return f"{self.PROCESSOR_VERSION}-{digest[:12]}"
+
+    def extraction_profile(self, document_type: str = None, force_ocr=False) -> Dict:
+        """Extraction settings for a document type (the default profile for unknown types)"""
+        profile = {**self.DEFAULT_PROFILE, **self.EXTRACTION_PROFILES.get(document_type, {})}
+        if force_ocr:
+            profile['ocr'] = True
+        return profile
+
+    @contextmanager
+    def use_profile(self, document_type: str = None, force_ocr=False):
+        """Apply a document type's profile to text extraction inside the block"""
+        previous = self.profile
+        self.profile = self.extraction_profile(document_type, force_ocr)
+        try:
+            yield self.profile
+        finally:
+            self.profile = previous
+
+    def _stage(self, name: str, **counts):
+        """Time a pipeline stage when a timer is attached (no-op otherwise)"""
+        return self.timer.stage(name, **counts) if self.timer else nullcontext({})
+
+    @property
+    def ocr_engine(self) -> OCREngine:
+        """OCR engine for the current process (resolved lazily so processors can be pickled)"""
+        return get_ocr_engine(self.ocr_backend)
 
     def extract_text_from_pdf(self, file_path: str) -> str:
         """Extract text from PDF using PyMuPDF"""
         try:
-            doc = fitz.open(file_path)
-            text = ""
+            with self._stage('pdf_open'):
+                doc = fitz.open(file_path)
+                page_count = len(doc)
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text += page.get_text()
+            # Extra page workers would each need their own budget, so bounded mode stays serial
+            if self.pdf_workers > 1 and page_count >= self.parallel_page_threshold and not self.memory_budget:
+                doc.close()
+                # Stages inside page workers aren't visible here, so time the fan-out as a whole
+                with self._stage('pdf_parallel', pages=page_count):
+                    page_texts = self._extract_pdf_pages_parallel(file_path, page_count)
+            else:
+                page_texts = []
+                chars = 0
+                max_chars = self.profile['max_chars']
+                for page_num in range(page_count):
+                    page_texts.append(self._extract_page_text(doc.load_page(page_num)))
+                    self._release_page_memory()
+                    chars += len(page_texts[-1])
+                    if max_chars and chars >= max_chars:
+                        break
+                doc.close()
             
-            doc.close()
-            return text.strip()
+            # Join once in page order instead of growing a string per page
+            return self._limit_chars("".join(page_texts)).strip()
             
         except Exception as e:
             print(f"Error extracting text from PDF: {str(e)}")
             return ""
 
-    def preprocess_image(self, image_path: str) -> np.ndarray:
-        """Preprocess image for better OCR accuracy"""
+    def _extract_pdf_pages_parallel(self, file_path: str, page_count: int) -> List[str]:
+        """Split the page range across worker processes and collect page texts in order"""
+        workers = min(self.pdf_workers, page_count)
+        chunk_size = -(-page_count // workers)  # ceiling division
+        ranges = [(start, min(start + chunk_size, page_count))
+                  for start in range(0, page_count, chunk_size)]
+        
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            chunks = executor.map(
+                _extract_pdf_page_range,
+                [self] * len(ranges),
+                [file_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges]
+            )
+            return [page_text for chunk in chunks for page_text in chunk]
+
+    def _release_page_memory(self):
+        """Free cached page resources between pages when running under a memory budget"""
+        if self.memory_budget:
+            self.memory_budget.release()
+
+    def _extract_page_text(self, page) -> str:
+        """Get a page's text layer, falling back to OCR for scanned pages"""
+        with self._stage('pdf_text_layer', pages=1):
+            text = page.get_text()
+        
+        if self.ocr_fallback and self.profile['ocr'] and len(text.strip()) < self.ocr_min_chars:
+            ocr_text = self._ocr_pdf_page(page)
+            if len(ocr_text.strip()) > len(text.strip()):
+                return ocr_text + "\n"
+        
+        return text
+
+    def _ocr_pdf_page(self, page) -> str:
+        """Rasterize a PDF page and OCR it without copying the pixel buffer"""
         try:
-            # Read image
-            img = cv2.imread(image_path)
+            dpi = self.ocr_dpi
+            if self.memory_budget:
+                dpi = self.memory_budget.dpi_for_page(page.rect.width, page.rect.height, dpi)
+            with self._stage('pdf_render', pages=1) as work:
+                pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+                work['pixels'] = pix.width * pix.height
             
-            # Convert to grayscale
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            # View the pixmap samples as a 2-D array; rows may be padded to pix.stride
+            img = np.ndarray(
+                (pix.height, pix.width), dtype=np.uint8,
+                buffer=pix.samples_mv, strides=(pix.stride, 1)
+            )
             
-            # Apply noise reduction
-            denoised = cv2.medianBlur(gray, 3)
+            # A rendered page is already the whole document, so there is nothing to crop
+            processed_img = self.preprocess_array(img, skip=('crop',))
+            if processed_img is None:
+                return ""
             
-            # Apply thresholding
-            thresh = cv2.adaptiveThreshold(
-                denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-            )
+            return self.ocr_processed_image(processed_img).strip()
+            
+        except Exception as e:
+            print(f"Error running OCR on PDF page: {str(e)}")
+            return ""
+
+    def preprocess_image(self, image_path: str) -> np.ndarray:
+        """Preprocess image for better OCR accuracy"""
+        try:
+            if self.memory_budget:
+                self.image_preprocessor.max_pixels = self.memory_budget.max_image_pixels()
             
-            return thresh
+            # Decode at reduced size, crop, deskew, normalize and threshold
+            with self._stage('preprocess') as work:
+                processed = self.image_preprocessor.process_file(image_path)
+                work['pixels'] = processed.size if processed is not None else 0
+            self._record_preprocess_timings()
+            return processed
             
         except Exception as e:
             print(f"Error preprocessing image: {str(e)}")
             return None
 
+    def preprocess_array(self, img: np.ndarray, skip=()) -> np.ndarray:
+        """Preprocess an in-memory BGR or grayscale image for OCR"""
+        try:
+            with self._stage('preprocess', pixels=img.shape[0] * img.shape[1]):
+                processed = self.image_preprocessor.run(img, skip=skip)
+            self._record_preprocess_timings()
+            return processed
+            
+        except Exception as e:
+            print(f"Error preprocessing image: {str(e)}")
+            return None
+
+    def _record_preprocess_timings(self):
+        """Break the 'preprocess' stage down by pipeline step (preprocess.decode, preprocess.deskew, ...)"""
+        if self.timer:
+            for step, (wall_ms, cpu_ms) in self.image_preprocessor.last_timings.items():
+                self.timer.add(f'preprocess.{step}', wall_ms, cpu_ms)
+
+    def ocr_processed_image(self, processed_img: np.ndarray) -> str:
+        """OCR a preprocessed image, restricted to keyword regions when region_ocr is on"""
+        with self._stage('ocr', pages=1, pixels=processed_img.shape[0] * processed_img.shape[1]):
+            if self.region_ocr:
+                text = self._ocr_keyword_regions(processed_img)
+                if text is not None:
+                    return text
+            
+            return self.ocr_engine.image_to_string(processed_img, psm=self.profile['psm'])
+
+    def find_text_regions(self, binary: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Find text blocks (x, y, w, h) in a thresholded image via morphology and contours"""
+        height, width = binary.shape[:2]
+        ink = cv2.bitwise_not(binary)
+        
+        # Smear characters horizontally into lines and lines into blocks
+        kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT, (max(9, width // 40), max(3, height // 200))
+        )
+        blocks = cv2.dilate(ink, kernel, iterations=2)
+        
+        contours, _ = cv2.findContours(blocks, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_area = width * height * 0.0005
+        regions = [cv2.boundingRect(contour) for contour in contours]
+        return [region for region in regions if region[2] * region[3] >= min_area]
+
+    def _ocr_keyword_regions(self, processed_img: np.ndarray) -> Optional[str]:
+        """Full-quality OCR of the blocks nearest score keywords, or None if none are found"""
+        regions = self.find_text_regions(processed_img)
+        if not regions:
+            return None
+        
+        scale = self.REGION_SCAN_SCALE
+        small = cv2.resize(processed_img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        words = self.ocr_engine.image_to_words(small, psm=11)
+        
+        hits = []
+        for text, x, y, w, h in words:
+            token = re.sub(r'[^a-z@]', '', text.lower())
+            if '@' in token or any(keyword in token for keyword in self.REGION_KEYWORDS):
+                hits.append(((x + w / 2) / scale, (y + h / 2) / scale))
+        
+        if not hits:
+            return None
+        
+        height, width = processed_img.shape[:2]
+        margin = max(10, height // 100)
+        
+        def region_score(region):
+            x, y, w, h = region
+            return sum(
+                1 for cx, cy in hits
+                if x - margin <= cx <= x + w + margin and y - margin <= cy <= y + h + margin
+            )
+        
+        ranked = sorted(((region_score(region), region) for region in regions), key=lambda item: -item[0])
+        selected = [region for score, region in ranked[:self.max_ocr_regions] if score > 0]
+        if not selected:
+            return None
+        
+        # Recognize the chosen blocks in reading order
+        texts = []
+        for x, y, w, h in sorted(selected, key=lambda region: (region[1], region[0])):
+            x0, y0 = max(0, x - margin), max(0, y - margin)
+            crop = processed_img[y0:min(height, y + h + margin), x0:min(width, x + w + margin)]
+            texts.append(self.ocr_engine.image_to_string(crop, psm=6).strip())
+        
+        return "\n".join(text for text in texts if text)
+
     def extract_text_from_image(self, file_path: str) -> str:
         """Extract text from image using OCR"""
+        if not self.profile['ocr']:
+            return ""
+        
         try:
             # Preprocess image
             processed_img = self.preprocess_image(file_path)
             
             if processed_img is not None:
                 # Apply OCR
-                text = pytesseract.image_to_string(processed_img, config='--psm 6')
-                return text.strip()
+                text = self.ocr_processed_image(processed_img)
+                return self._limit_chars(text).strip()
             else:
                 # Fallback to direct OCR
-                text = pytesseract.image_to_string(Image.open(file_path))
+                text = self.ocr_engine.image_to_string(np.asarray(Image.open(file_path).convert('L')), psm=3)
                 return text.strip()
                 
         except Exception as e:
             print(f"Error extracting text from image: {str(e)}")
             return ""
 
+    @staticmethod
+    def document_kind(file_path: str, mime_type: str) -> Optional[str]:
+        """Classify a file as 'pdf', 'image', 'docx' or 'doc' (None if unsupported)"""
+        mime = (mime_type or '').lower()
+        if 'pdf' in mime:
+            return 'pdf'
+        if any(img_type in mime for img_type in ['image', 'jpeg', 'png', 'jpg']):
+            return 'image'
+        if 'wordprocessingml' in mime:
+            return 'docx'
+        if 'msword' in mime:
+            return 'doc'
+        
+        # Try to determine by file extension
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext == '.pdf':
+            return 'pdf'
+        if file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
+            return 'image'
+        if file_ext in ['.docx', '.doc']:
+            return file_ext[1:]
+        return None
+
+    def extract_text_from_docx(self, file_path: str) -> str:
+        """Read the text layer of a .docx straight from its XML (no OCR)"""
+        try:
+            with self._stage('docx_text', pages=1):
+                return self._limit_chars("".join(self._limit_chunks(iter_docx_text(file_path)))).strip()
+        except Exception as e:
+            print(f"Error extracting text from DOCX: {str(e)}")
+            return ""
+
+    def extract_text_from_doc(self, file_path: str) -> str:
+        """Extract text from a legacy Word .doc file"""
+        try:
+            with self._stage('doc_text', pages=1):
+                return self._limit_chars(extract_doc_text(file_path))
+        except Exception as e:
+            print(f"Error extracting text from DOC: {str(e)}")
+            return ""
+
     def extract_text_from_document(self, file_path: str, mime_type: str) -> str:
         """Main function to extract text from any supported document"""
-        text = ""
+        kind = self.document_kind(file_path, mime_type)
+        
+        if kind == 'pdf':
+            return self.extract_text_from_pdf(file_path)
+        if kind == 'image':
+            return self.extract_text_from_image(file_path)
+        if kind == 'docx':
+            return self.extract_text_from_docx(file_path)
+        if kind == 'doc':
+            return self.extract_text_from_doc(file_path)
+        return ""
+
+    def _limit_chars(self, text: str) -> str:
+        """Cut text to the active profile's character limit"""
+        max_chars = self.profile['max_chars']
+        return text[:max_chars] if max_chars else text
+
+    def _limit_chunks(self, chunks: Iterator[str]) -> Iterator[str]:
+        """Stop pulling chunks once the active profile's character limit is reached"""
+        max_chars = self.profile['max_chars']
+        chars = 0
+        try:
+            for chunk in chunks:
+                yield chunk
+                chars += len(chunk)
+                if max_chars and chars >= max_chars:
+                    return
+        finally:
+            # Closing the source releases its file handles right away
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def count_pages(self, file_path: str, mime_type: str) -> int:
+        """Number of pages a document has (images and Word files count as one)"""
+        if self.document_kind(file_path, mime_type) == 'pdf':
+            try:
+                with fitz.open(file_path) as doc:
+                    return len(doc)
+            except Exception:
+                return 0
+        return 1
+
+    def iter_document_text(self, file_path: str, mime_type: str) -> Iterator[str]:
+        """Yield document text incrementally (page by page for PDFs, paragraphs for DOCX)"""
+        yield from self._limit_chunks(self._iter_document_chunks(file_path, mime_type))
+
+    def _iter_document_chunks(self, file_path: str, mime_type: str) -> Iterator[str]:
+        kind = self.document_kind(file_path, mime_type)
         
-        if mime_type and 'pdf' in mime_type.lower():
-            text = self.extract_text_from_pdf(file_path)
-        elif mime_type and any(img_type in mime_type.lower() for img_type in ['image', 'jpeg', 'png', 'jpg']):
-            text = self.extract_text_from_image(file_path)
+        if kind == 'docx':
+            try:
+                yield from iter_docx_text(file_path)
+            except Exception as e:
+                print(f"Error extracting text from DOCX: {str(e)}")
+        elif kind == 'pdf':
+            try:
+                doc = fitz.open(file_path)
+            except Exception as e:
+                print(f"Error extracting text from PDF: {str(e)}")
+                return
+            
+            try:
+                for page_num in range(len(doc)):
+                    yield self._extract_page_text(doc.load_page(page_num))
+                    self._release_page_memory()
+            finally:
+                doc.close()
         else:
-            # Try to determine by file extension
-            file_ext = os.path.splitext(file_path)[1].lower()
-            if file_ext == '.pdf':
-                text = self.extract_text_from_pdf(file_path)
-            elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
-                text = self.extract_text_from_image(file_path)
+            text = self.extract_text_from_document(file_path, mime_type)
+            if text:
+                yield text
+
+    def required_fields(self, form_data: Dict) -> List[str]:
+        """Fields worth looking for given what the form provides"""
+        fields = [field for field in self.VERIFIABLE_FIELDS if form_data.get(field)]
+        if form_data.get('full_name'):
+            fields.append('names')
+        return fields
+
+    def extract_structured_data_streaming(self, file_path: str, mime_type: str, form_data: Dict,
+                                          document_type: str = None, include_names=True) -> Tuple[str, Dict, bool]:
+        """Extract fields incrementally, stopping once every field in form_data is found.
+
+        Returns the text read so far, the extracted data, and whether the whole
+        document was read.
+        """
+        fields = self.fields_for_document_type(document_type)
+        run_ner = self.extraction_profile(document_type)['ner']
+        include_names = include_names and run_ner
+        wanted = {field for field in self.required_fields(form_data)
+                  if field in fields or (field == 'names' and run_ner)}
+        extracted_data = {}
+        chunks = []
+        text_length = 0
+        tail = ""
+        complete = True
         
-        return text
+        chunk_iter = self.iter_document_text(file_path, mime_type)
+        for chunk in chunk_iter:
+            chunks.append(chunk)
+            text_length += len(chunk)
+            
+            self._match_patterns(tail + chunk, extracted_data, fields)
+            tail = chunk[-self.STREAM_OVERLAP_CHARS:]
+            
+            found = {field for field in wanted if field in extracted_data}
+            # Names come from NER over the leading text, so they are settled once it is read
+            if 'names' in wanted and text_length >= self.NER_CHAR_LIMIT:
+                found.add('names')
+            
+            if found >= wanted:
+                complete = False
+                chunk_iter.close()
+                break
+        
+        text = "".join(chunks).strip()
+        if include_names:
+            self._extract_names(text, extracted_data)
+        
+        return text, extracted_data, complete
 
-    def extract_structured_data(self, text: str) -> Dict[str, any]:
+    def extract_structured_data(self, text: str, document_type: str = None, include_names=True) -> Dict[str, any]:
         """Extract structured data from text using patterns and NLP"""
         extracted_data = {}
+        profile = self.extraction_profile(document_type)
+        if profile['max_chars']:
+            text = text[:profile['max_chars']]
         
         # Extract using regex patterns
-        for field, pattern in self.patterns.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                if field in ['gpa', 'ielts_score']:
-                    extracted_data[field] = float(matches[0]) if matches[0] else None
-                elif field in ['gre_score', 'toefl_score']:
-                    extracted_data[field] = int(matches[0]) if matches[0] else None
-                else:
-                    extracted_data[field] = matches[0]
+        self._match_patterns(text, extracted_data, self.fields_for_document_type(document_type))
         
         # Extract names using spaCy NER
-        if nlp:
-            doc = nlp(text[:1000])  # Process first 1000 chars for performance
-            names = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
-            if names:
-                extracted_data['names'] = names[:3]  # Top 3 names
+        if include_names and profile['ner']:
+            self._extract_names(text, extracted_data)
         
         return extracted_data
 
+    def fields_for_document_type(self, document_type: str = None) -> List[str]:
+        """Regex fields to scan for in a document of the given type"""
+        fields = self.extraction_profile(document_type)['fields'] or self.patterns.keys()
+        return [field for field in self.patterns if field in fields]
+
+    def _match_patterns(self, text: str, extracted_data: Dict, fields: List[str] = None):
+        """Fill in regex fields not already present in extracted_data in one pass over the text"""
+        fields = [field for field in (fields or self.patterns) if field not in extracted_data]
+        if not fields:
+            return
+        
+        scanner = get_field_scanner(
+            {field: self.patterns[field] for field in fields},
+            {field: self.pattern_triggers[field] for field in fields if field in self.pattern_triggers}
+        )
+        with self._stage('regex', chars=len(text)):
+            found = scanner.scan(text)
+        for field, value in found.items():
+            if field in ['gpa', 'ielts_score']:
+                extracted_data[field] = float(value) if value else None
+            elif field in ['gre_score', 'toefl_score']:
+                extracted_data[field] = int(value) if value else None
+            else:
+                extracted_data[field] = value
+
+    def _extract_names(self, text: str, extracted_data: Dict):
+        """Extract person names from the leading text with spaCy NER"""
+        names = self.extract_names_batch([text])[0]
+        if names:
+            extracted_data['names'] = names  # Top 3 names
+
+    def extract_names_batch(self, texts: List[str], batch_size: int = 32, n_process: int = 1) -> List[Optional[List[str]]]:
+        """PERSON names for many texts in one nlp.pipe pass (entity recognizer only)"""
+        # Process leading text only for performance
+        return nlp_models.extract_person_names(
+            [text[:self.NER_CHAR_LIMIT] for text in texts],
+            limit=3, batch_size=batch_size, n_process=n_process
+        )
+
     def compare_with_form_data(self, extracted_data: Dict, form_data: Dict) -> Dict[str, any]:
         """Compare extracted document data with form submission data"""
         comparison_results = {
@@ -146,9 +847,7 @@ class DocumentProcessor:
         matched_fields = 0
         
         # Compare specific fields
-        comparable_fields = ['email', 'gpa', 'gre_score', 'toefl_score', 'ielts_score']
-        
-        for field in comparable_fields:
+        for field in self.VERIFIABLE_FIELDS:
             if field in form_data and form_data[field]:
                 total_fields += 1
                 
@@ -225,8 +924,25 @@ class DocumentProcessor:
 class DocumentAnalyzer:
     """Main analyzer class that orchestrates document processing"""
     
-    def __init__(self, tesseract_path=None):
-        self.processor = DocumentProcessor(tesseract_path)
+    def __init__(self, tesseract_path=None, cache: Optional[ExtractionCache] = None, use_cache=True,
+                 streaming=False, ner_batch_size=32, ner_processes=1,
+                 state_store: Optional[DocumentStateStore] = None, incremental=True,
+                 memory_budget_mb: Optional[int] = None, force_ocr=False, region_ocr=False, max_ocr_regions=4):
+        self.processor = DocumentProcessor(
+            tesseract_path, memory_budget_mb=memory_budget_mb, region_ocr=region_ocr, max_ocr_regions=max_ocr_regions
+        )
+        self.cache = cache if cache is not None else (ExtractionCache() if use_cache else None)
+        # Remember each document's extraction so re-runs only process new or changed files
+        self.state_store = state_store if state_store is not None else (
+            DocumentStateStore() if incremental else None
+        )
+        # Stop reading a document once every field present in the form has been found
+        self.streaming = streaming
+        # nlp.pipe settings for the per-application NER batch
+        self.ner_batch_size = ner_batch_size
+        self.ner_processes = ner_processes
+        # OCR every document, even types whose profile skips it (documents can also set 'force_ocr')
+        self.force_ocr = force_ocr
     
     def analyze_application_documents(self, application_id: int, documents: List[Dict], form_data: Dict) -> Dict:
         """Analyze all documents for an application"""
@@ -238,6 +954,7 @@ class DocumentAnalyzer:
             'summary': {
                 'total_documents': len(documents),
                 'successfully_processed': 0,
+                'reused_documents': 0,
                 'overall_confidence': 0.0,
                 'red_flags': [],
                 'recommendations': []
@@ -245,12 +962,17 @@ class DocumentAnalyzer:
         }
         
         all_extracted_data = {}
+        start = time.perf_counter()
+        application_timer = StageTimer()
+        doc_analyses = self._analyze_documents(documents, form_data, application_id)
         
         # Process each document
-        for doc in documents:
-            doc_analysis = self._analyze_single_document(doc, form_data)
+        for doc, doc_analysis in zip(documents, doc_analyses):
             analysis_results['individual_analyses'][doc['document_type']] = doc_analysis
             
+            if doc_analysis.get('reused'):
+                analysis_results['summary']['reused_documents'] += 1
+            
             if doc_analysis['extraction_success']:
                 analysis_results['summary']['successfully_processed'] += 1
                 # Merge extracted data
@@ -258,7 +980,8 @@ class DocumentAnalyzer:
         
         # Perform overall verification
         if all_extracted_data:
-            overall_comparison = self.processor.compare_with_form_data(all_extracted_data, form_data)
+            with application_timer.stage('compare'):
+                overall_comparison = self.processor.compare_with_form_data(all_extracted_data, form_data)
             analysis_results['overall_verification'] = overall_comparison
             analysis_results['summary']['overall_confidence'] = overall_comparison['confidence_score']
             
@@ -266,11 +989,158 @@ class DocumentAnalyzer:
             analysis_results['summary']['red_flags'] = self._identify_red_flags(overall_comparison)
             analysis_results['summary']['recommendations'] = self._generate_recommendations(overall_comparison, form_data)
         
+        analysis_results['timings'] = self._timings_section(doc_analyses, application_timer, start)
         return analysis_results
     
+    @staticmethod
+    def _timings_section(doc_analyses: List[Dict], application_timer: StageTimer, start: float) -> Dict:
+        """Per-document stage timings plus totals across the whole application"""
+        totals = StageTimer()
+        documents = []
+        for doc_analysis in doc_analyses:
+            doc_timer = StageTimer()
+            doc_timer.stages = doc_analysis.get('timings', {})
+            totals.merge(doc_timer)
+            documents.append({
+                'document_type': doc_analysis['document_type'],
+                'filename': doc_analysis['filename'],
+                'stages': doc_analysis.get('timings', {})
+            })
+        totals.merge(application_timer)
+        
+        return {
+            'wall_ms': round((time.perf_counter() - start) * 1000, 2),
+            'stages': totals.as_dict(),
+            'documents': documents
+        }
+    
     def _analyze_single_document(self, document: Dict, form_data: Dict) -> Dict:
         """Analyze a single document"""
-        result = {
+        return self._analyze_documents([document], form_data)[0]
+    
+    def preanalyze_documents(self, application_id: int, documents: List[Dict]) -> int:
+        """Extract text, fields and names for newly uploaded documents ahead of analysis.
+
+        Results are kept in the document state store, so a later
+        analyze_application_documents only has to compare them with the form.
+        Returns how many documents were extracted successfully.
+        """
+        if self.state_store is None:
+            return 0
+        results = self._analyze_documents(documents, None, application_id, prune=False)
+        return sum(1 for result in results if result['extraction_success'])
+    
+    def _analyze_documents(self, documents: List[Dict], form_data: Optional[Dict],
+                           application_id: Optional[int] = None, prune=True) -> List[Dict]:
+        """Extract every document, run NER over all of them in one batch, then verify each"""
+        track_state = self.state_store is not None and application_id is not None
+        stored_states = self.state_store.get_states(application_id) if track_state else {}
+        
+        extractions = []
+        for document in documents:
+            # Every stage the processor runs for this document is recorded on its own timer
+            timer = StageTimer()
+            self.processor.timer = timer
+            try:
+                content_hash = None
+                if self.cache or track_state:
+                    with timer.stage('hash'):
+                        content_hash = self._content_hash(document)
+                item = self._reuse_document_state(document, stored_states, content_hash)
+                if item is None:
+                    item = self._extract_document(document, form_data, content_hash)
+                    if self.processor.memory_budget:
+                        # Don't carry one document's buffers into the next
+                        self.processor.memory_budget.release(force=True)
+            finally:
+                self.processor.timer = None
+            item['timer'] = timer
+            extractions.append(item)
+        
+        # Cache hits and reused documents already carry their names
+        pending = [item for item in extractions if item['needs_names']]
+        if pending:
+            try:
+                ner_timer = StageTimer()
+                with ner_timer.stage('ner'):
+                    names_batch = self.processor.extract_names_batch(
+                        [item['text'] for item in pending],
+                        batch_size=self.ner_batch_size, n_process=self.ner_processes
+                    )
+                for item, names in zip(pending, names_batch):
+                    if names:
+                        item['result']['extracted_data']['names'] = names
+                self._split_batch_stage(ner_timer.stages['ner'], pending, self.processor.NER_CHAR_LIMIT)
+            except Exception as e:
+                print(f"Error extracting names: {str(e)}")
+        
+        results = []
+        new_states = []
+        for document, item in zip(documents, extractions):
+            result = item['result']
+            timer = item['timer']
+            
+            if item['cache_key']:
+                with timer.stage('cache_store'):
+                    self.cache.put(item['cache_key'], item['text'], result['extracted_data'])
+            
+            if track_state and item['store_state'] and document.get('id') is not None:
+                new_states.append((
+                    document['id'], item['content_hash'], self._state_version(document),
+                    result['extracted_text'], result['extracted_data']
+                ))
+            
+            if result['extraction_success'] and form_data is not None:
+                # Compare with form data (always redone; the form may have changed)
+                with timer.stage('compare'):
+                    comparison = self.processor.compare_with_form_data(result['extracted_data'], form_data)
+                result['verification_results'] = comparison
+            
+            result['timings'] = timer.as_dict()
+            results.append(result)
+        
+        if track_state:
+            self.state_store.save_states(application_id, new_states)
+            if prune:
+                self.state_store.prune(
+                    application_id, [document['id'] for document in documents if document.get('id') is not None]
+                )
+        
+        return results
+    
+    @staticmethod
+    def _split_batch_stage(entry: Dict, items: List[Dict], char_limit: int):
+        """Attribute a stage that ran over several documents to each by its share of the text"""
+        chars = [min(len(item['text']), char_limit) for item in items]
+        total_chars = sum(chars) or 1
+        for item, item_chars in zip(items, chars):
+            share = item_chars / total_chars
+            item['timer'].add('ner', entry['wall_ms'] * share, entry['cpu_ms'] * share,
+                              peak_rss_mb=entry.get('peak_rss_mb'), chars=item_chars)
+    
+    def _state_version(self, document: Dict) -> str:
+        """Extraction settings a stored document state is only valid for"""
+        version = f"{self.processor.cache_version}/{document['document_type']}"
+        if self._ocr_requested(document) and not self.processor.extraction_profile(document['document_type'])['ocr']:
+            version += "+ocr"
+        return version
+    
+    def _ocr_requested(self, document: Dict) -> bool:
+        return self.force_ocr or bool(document.get('force_ocr'))
+    
+    @staticmethod
+    def _content_hash(document: Dict) -> Optional[str]:
+        # Content-addressed uploads already know their hash
+        if document.get('content_hash'):
+            return document['content_hash']
+        try:
+            return file_sha256(document['file_path'])
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _new_result(document: Dict) -> Dict:
+        return {
             'document_type': document['document_type'],
             'filename': document['original_filename'],
             'extraction_success': False,
@@ -278,31 +1148,91 @@ class DocumentAnalyzer:
             'extracted_data': {},
             'verification_results': {}
         }
+    
+    def _reuse_document_state(self, document: Dict, stored_states: Dict[int, Dict],
+                              content_hash: Optional[str]) -> Optional[Dict]:
+        """Rebuild a document's result from its stored state if the file hasn't changed"""
+        state = stored_states.get(document.get('id'))
+        if (not state or not content_hash or state['file_hash'] != content_hash
+                or state['processor_version'] != self._state_version(document)):
+            return None
+        
+        result = self._new_result(document)
+        result['extraction_success'] = True
+        result['extracted_text'] = state['extracted_text']
+        result['extracted_data'] = state['extracted_data']
+        result['reused'] = True
+        return {'result': result, 'text': '', 'needs_names': False, 'cache_key': None,
+                'content_hash': content_hash, 'store_state': False}
+    
+    def _extract_document(self, document: Dict, form_data: Dict, content_hash: Optional[str] = None) -> Dict:
+        """Extract text and regex fields for a document, using the cache when possible"""
+        result = self._new_result(document)
+        item = {'result': result, 'text': '', 'needs_names': False, 'cache_key': None,
+                'content_hash': content_hash, 'store_state': False}
         
         try:
-            # Extract text
-            text = self.processor.extract_text_from_document(
-                document['file_path'], 
-                document['mime_type']
-            )
+            cache_key = None
+            cached = None
+            if self.cache:
+                content_hash = content_hash or file_sha256(document['file_path'])
+                # Extracted fields depend on the document type as well as the bytes
+                cache_key = self.cache.make_key(content_hash, self._state_version(document))
+                with self.processor._stage('cache_lookup'):
+                    cached = self.cache.get(cache_key)
+            
+            complete = True
+            profile = self.processor.extraction_profile(document['document_type'], self._ocr_requested(document))
+            if cached:
+                # Unchanged file: skip parsing/OCR and go straight to comparison
+                text = cached['text']
+                extracted_data = cached['extracted_data']
+                result['cache_hit'] = True
+            elif self.streaming and form_data:
+                # Early exit needs the form to know which fields to look for
+                with self.processor.use_profile(document['document_type'], self._ocr_requested(document)):
+                    text, extracted_data, complete = self.processor.extract_structured_data_streaming(
+                        document['file_path'],
+                        document['mime_type'],
+                        form_data,
+                        document['document_type'],
+                        include_names=False
+                    )
+                result['early_exit'] = not complete
+            else:
+                # Extract text with the OCR mode and length limit of the document's type
+                with self.processor.use_profile(document['document_type'], self._ocr_requested(document)):
+                    text = self.processor.extract_text_from_document(
+                        document['file_path'], 
+                        document['mime_type']
+                    )
+                
+                # Extract structured data (names come later from the batched NER pass)
+                extracted_data = (
+                    self.processor.extract_structured_data(
+                        text, document['document_type'], include_names=False
+                    ) if text else {}
+                )
             
             result['extracted_text'] = text[:500]  # Store first 500 chars for preview
+            item['text'] = text
             
             if text:
                 result['extraction_success'] = True
-                
-                # Extract structured data
-                extracted_data = self.processor.extract_structured_data(text)
                 result['extracted_data'] = extracted_data
+                item['needs_names'] = not cached and profile['ner']
                 
-                # Compare with form data
-                comparison = self.processor.compare_with_form_data(extracted_data, form_data)
-                result['verification_results'] = comparison
+                # Failed extractions and partial (early-exit) reads aren't cached
+                if cache_key and not cached and complete:
+                    item['cache_key'] = cache_key
+                item['store_state'] = complete and item['content_hash'] is not None
+            elif not profile['ocr'] and self.processor.document_kind(document['file_path'], document['mime_type']) == 'image':
+                result['ocr_skipped'] = True
                 
         except Exception as e:
             result['error'] = str(e)
             
-        return result
+        return item
     
     def _identify_red_flags(self, comparison: Dict) -> List[str]:
         """Identify potential issues that need attention"""
@@ -0,0 +1,96 @@
+import sqlite3
+import json
+from typing import Dict, Iterable, List, Tuple
+
+class DocumentStateStore:
+    """Per-document extraction results, so re-analysis only touches new or changed files"""
+
+    def __init__(self, db_path='app.db'):
+        self.db_path = db_path
+        self._initialize_table()
+
+    def _connect(self):
+        # Analysis workers write here concurrently
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _initialize_table(self):
+        """Create the document state table"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS document_analysis_state (
+                document_id INTEGER PRIMARY KEY,
+                application_id INTEGER NOT NULL,
+                file_hash TEXT NOT NULL,
+                processor_version TEXT NOT NULL,
+                extracted_text TEXT,
+                extracted_data TEXT,
+                analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (document_id) REFERENCES documents (id),
+                FOREIGN KEY (application_id) REFERENCES applications (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_document_state_application
+            ON document_analysis_state (application_id)
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def get_states(self, application_id: int) -> Dict[int, Dict]:
+        """Stored state for every analyzed document of an application, keyed by document id"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT document_id, file_hash, processor_version, extracted_text, extracted_data
+            FROM document_analysis_state WHERE application_id = ?
+        ''', (application_id,))
+        rows = cursor.fetchall()
+        conn.close()
+
+        return {
+            row[0]: {
+                'file_hash': row[1],
+                'processor_version': row[2],
+                'extracted_text': row[3] or '',
+                'extracted_data': json.loads(row[4]) if row[4] else {}
+            }
+            for row in rows
+        }
+
+    def save_states(self, application_id: int, states: Iterable[Tuple[int, str, str, str, Dict]]):
+        """Store (document_id, file_hash, processor_version, text preview, extracted_data) rows"""
+        rows = [
+            (document_id, application_id, file_hash, version, preview, json.dumps(extracted_data))
+            for document_id, file_hash, version, preview, extracted_data in states
+        ]
+        if not rows:
+            return
+
+        conn = self._connect()
+        conn.executemany('''
+            INSERT OR REPLACE INTO document_analysis_state
+                (document_id, application_id, file_hash, processor_version, extracted_text, extracted_data)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        conn.close()
+
+    def prune(self, application_id: int, keep_document_ids: List[int]):
+        """Forget documents that are no longer attached to the application"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            'SELECT document_id FROM document_analysis_state WHERE application_id = ?', (application_id,)
+        )
+        keep = set(keep_document_ids)
+        stale = [(row[0],) for row in cursor.fetchall() if row[0] not in keep]
+        if stale:
+            cursor.executemany('DELETE FROM document_analysis_state WHERE document_id = ?', stale)
+
+        conn.commit()
+        conn.close()
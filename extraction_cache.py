@@ -0,0 +1,129 @@
+import sqlite3
+import hashlib
+import json
+import time
+from typing import Dict, Optional
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file's bytes without loading it into memory at once"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ExtractionCache:
+    """Persistent cache of extracted text and structured fields keyed by file content"""
+
+    def __init__(self, db_path='extraction_cache.db', max_entries=5000, max_bytes=256 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._initialize_table()
+
+    def _connect(self):
+        # Several OCR workers may share the cache file
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _initialize_table(self):
+        """Create the cache table"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                cache_key TEXT PRIMARY KEY,
+                extracted_text TEXT,
+                extracted_data TEXT,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_extraction_cache_accessed
+            ON extraction_cache (last_accessed)
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(content_hash: str, processor_version: str) -> str:
+        """Combine the content hash with the processor version"""
+        return f"{processor_version}:{content_hash}"
+
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """Return cached text and fields, or None on a miss"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT extracted_text, extracted_data FROM extraction_cache WHERE cache_key = ?
+        ''', (cache_key,))
+        row = cursor.fetchone()
+
+        if row:
+            cursor.execute('''
+                UPDATE extraction_cache SET last_accessed = ? WHERE cache_key = ?
+            ''', (time.time(), cache_key))
+            conn.commit()
+
+        conn.close()
+
+        if not row:
+            return None
+
+        return {
+            'text': row[0] or '',
+            'extracted_data': json.loads(row[1]) if row[1] else {}
+        }
+
+    def put(self, cache_key: str, text: str, extracted_data: Dict):
+        """Store extraction output and evict least recently used entries if over budget"""
+        data_json = json.dumps(extracted_data)
+        size_bytes = len(text.encode('utf-8')) + len(data_json)
+        now = time.time()
+
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT OR REPLACE INTO extraction_cache
+                (cache_key, extracted_text, extracted_data, size_bytes, created_at, last_accessed)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (cache_key, text, data_json, size_bytes, now, now))
+
+        self._evict(cursor)
+
+        conn.commit()
+        conn.close()
+
+    def _evict(self, cursor):
+        """Drop least recently used entries until both limits are respected"""
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM extraction_cache')
+        count, total_bytes = cursor.fetchone()
+
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        cursor.execute('''
+            SELECT cache_key, size_bytes FROM extraction_cache ORDER BY last_accessed ASC
+        ''')
+
+        stale_keys = []
+        for cache_key, size_bytes in cursor.fetchall():
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            stale_keys.append((cache_key,))
+            count -= 1
+            total_bytes -= size_bytes
+
+        cursor.executemany('DELETE FROM extraction_cache WHERE cache_key = ?', stale_keys)
+
+    def clear(self):
+        """Remove every cached entry"""
+        conn = self._connect()
+        conn.execute('DELETE FROM extraction_cache')
+        conn.commit()
+        conn.close()
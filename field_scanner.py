@@ -0,0 +1,128 @@
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+class FieldScanner:
+    """Find the first match of several field patterns in a single pass over the text.
+
+    Each field has a cheap lowercase *trigger* (a keyword, '@', a digit run)
+    that every match of the field must touch. All triggers are combined into
+    one regex that walks the lowercased text once; the full, case-insensitive
+    field pattern is only tried around trigger hits, and a field stops being
+    looked for once found. Triggers are given as ``(regex, mode[, lookback])``:
+
+        'start'  - the match begins somewhere inside the trigger span (keywords)
+        'within' - the match lies entirely inside the trigger span (digit runs)
+        'before' - the match runs through the trigger and may begin up to a
+                   run of ``lookback`` characters earlier (an email's '@')
+
+    Fields may share an identical trigger, but different triggers must not
+    overlap. Fields without a trigger fall back to their own ``re.search``.
+    """
+
+    def __init__(self, patterns: Dict[str, str], triggers: Dict[str, Tuple] = None, flags=re.IGNORECASE):
+        self.fields = list(patterns)
+        self.flags = flags
+        self.triggers = {field: spec for field, spec in (triggers or {}).items() if field in patterns}
+        self._compiled = {field: re.compile(pattern, flags) for field, pattern in patterns.items()}
+        self._lookback = {
+            field: re.compile(spec[2], re.IGNORECASE)
+            for field, spec in self.triggers.items() if len(spec) > 2 and spec[2]
+        }
+
+        # Fields with an identical trigger regex share one group in the combined regex
+        self._trigger_groups = []
+        for field in self.fields:
+            if field not in self.triggers:
+                continue
+            for group in self._trigger_groups:
+                if self.triggers[group[0]][0] == self.triggers[field][0]:
+                    group.append(field)
+                    break
+            else:
+                self._trigger_groups.append([field])
+        self._trigger_regexes = {}
+
+    def _trigger_regex(self, fields: frozenset, case_sensitive: bool):
+        """Combined trigger regex for the remaining fields (cached per field set)"""
+        key = (fields, case_sensitive)
+        if key not in self._trigger_regexes:
+            alternatives = [
+                f'(?P<t{index}>{self.triggers[group[0]][0]})'
+                for index, group in enumerate(self._trigger_groups) if fields.intersection(group)
+            ]
+            flags = 0 if case_sensitive else re.IGNORECASE
+            self._trigger_regexes[key] = re.compile('|'.join(alternatives), flags)
+        return self._trigger_regexes[key]
+
+    def scan(self, text: str, fields: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Return {field: first matched value} for the requested fields"""
+        wanted = [field for field in self.fields if fields is None or field in set(fields)]
+        found = {}
+
+        # Fields without triggers can't join the single pass
+        for field in wanted:
+            if field not in self.triggers:
+                match = self._compiled[field].search(text)
+                if match:
+                    found[field] = self._value(match)
+
+        remaining = frozenset(field for field in wanted if field in self.triggers and field not in found)
+
+        # Lowercasing can change the length of some Unicode text; search case-insensitively then
+        lowered = text.lower()
+        case_sensitive = len(lowered) == len(text)
+        haystack = lowered if case_sensitive else text
+
+        position = 0
+        while remaining:
+            trigger_regex = self._trigger_regex(remaining, case_sensitive)
+            hit = trigger_regex.search(haystack, position)
+            if not hit:
+                break
+
+            for field in self._trigger_groups[int(hit.lastgroup[1:])]:
+                if field not in remaining:
+                    continue
+                match = self._check_trigger(field, text, haystack, hit.start(), hit.end())
+                if match:
+                    found[field] = self._value(match)
+                    remaining = remaining - {field}
+
+            position = hit.end()
+
+        return found
+
+    def _check_trigger(self, field: str, text: str, haystack: str, start: int, end: int):
+        """Try the field's full pattern around a trigger hit"""
+        compiled = self._compiled[field]
+        mode = self.triggers[field][1]
+
+        if mode == 'within':
+            # One extra character keeps word boundaries at the end of the span intact
+            return compiled.search(text, start, end + 1)
+
+        if mode == 'before':
+            lookback = self._lookback.get(field)
+            while lookback and start > 0 and lookback.match(haystack, start - 1):
+                start -= 1
+
+        for candidate in range(start, end):
+            match = compiled.match(text, candidate)
+            if match:
+                return match
+        return None
+
+    @staticmethod
+    def _value(match) -> str:
+        return match.group(1) if match.groups() else match.group(0)
+
+# Compiled scanners shared by every processor with the same pattern set
+_scanners = {}
+
+def get_field_scanner(patterns: Dict[str, str], triggers: Dict[str, Tuple] = None) -> FieldScanner:
+    """Compile a scanner for a pattern set once per process"""
+    key = (tuple(sorted(patterns.items())), tuple(sorted((triggers or {}).items())))
+    scanner = _scanners.get(key)
+    if scanner is None:
+        scanner = _scanners[key] = FieldScanner(patterns, triggers)
+    return scanner
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import time
+from typing import Optional, Sequence
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+class ImagePreprocessor:
+    """Resolution-aware preprocessing pipeline that prepares images for OCR"""
+
+    STAGES = ('crop', 'deskew', 'normalize', 'denoise', 'threshold')
+
+    # cv2.imread flags that let the decoder downscale (JPEG decodes at 1/2, 1/4, 1/8 natively)
+    REDUCED_DECODE_FLAGS = [
+        (8, 'IMREAD_REDUCED_GRAYSCALE_8'),
+        (4, 'IMREAD_REDUCED_GRAYSCALE_4'),
+        (2, 'IMREAD_REDUCED_GRAYSCALE_2'),
+        (1, 'IMREAD_GRAYSCALE')
+    ]
+
+    def __init__(self, stages: Sequence[str] = STAGES, decode_long_side=2000, max_long_side=3000,
+                 target_text_height=32, min_document_area=0.2, max_skew_angle=15.0,
+                 max_pixels: Optional[int] = None, low_memory=False):
+        """
+        stages: which pipeline stages to run, in STAGES order
+        decode_long_side: smallest long side the reduced decode may produce
+        max_long_side: never upscale past this long side while normalizing
+        target_text_height: median glyph height (px) to scale text to; None disables it
+        min_document_area: smallest fraction of the frame a detected page may cover
+        max_skew_angle: larger estimated angles are treated as noise and ignored
+        max_pixels: decode photos small enough to stay under this many pixels
+        low_memory: filter in place and detect the page on a small copy
+        """
+        self.stages = [stage for stage in self.STAGES if stage in stages]
+        self.decode_long_side = decode_long_side
+        self.max_long_side = max_long_side
+        self.target_text_height = target_text_height
+        self.min_document_area = min_document_area
+        self.max_skew_angle = max_skew_angle
+        self.max_pixels = max_pixels
+        self.low_memory = low_memory
+        # (wall ms, CPU ms) of each step run on the last image, decode included
+        self.last_timings = {}
+
+    def process_file(self, image_path: str) -> Optional[np.ndarray]:
+        """Decode an image file at reduced size and run the pipeline"""
+        self.last_timings = {}
+
+        start, cpu_start = time.perf_counter(), time.process_time()
+        img = self.load(image_path)
+        self.last_timings['decode'] = (
+            (time.perf_counter() - start) * 1000, (time.process_time() - cpu_start) * 1000
+        )
+
+        if img is None:
+            return None
+
+        return self.run(img, reset_timings=False)
+
+    def load(self, image_path: str) -> Optional[np.ndarray]:
+        """Decode straight to grayscale, letting the decoder downscale large photos"""
+        try:
+            with Image.open(image_path) as header:
+                width, height = header.size
+        except Exception:
+            width = height = 0
+
+        factor = self._decode_factor(width, height)
+        flag = dict(self.REDUCED_DECODE_FLAGS)[factor]
+        img = cv2.imread(image_path, getattr(cv2, flag))
+
+        # Reduced decoding stops at 1/8; shrink further if that still doesn't fit
+        if img is not None and self.max_pixels and img.size > self.max_pixels:
+            scale = (self.max_pixels / float(img.size)) ** 0.5
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return img
+
+    def _decode_factor(self, width: int, height: int) -> int:
+        """Largest reduction that keeps decode_long_side, or more if max_pixels requires it"""
+        long_side = max(width, height)
+        for factor, _ in self.REDUCED_DECODE_FLAGS:
+            if factor == 1 or long_side // factor >= self.decode_long_side:
+                break
+
+        if self.max_pixels:
+            while factor < 8 and (width // factor) * (height // factor) > self.max_pixels:
+                factor *= 2
+        return factor
+
+    def run(self, img: np.ndarray, skip: Sequence[str] = (), reset_timings=True) -> np.ndarray:
+        """Run the configured stages over an in-memory BGR or grayscale image"""
+        if reset_timings:
+            self.last_timings = {}
+
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+        for stage in self.stages:
+            if stage in skip:
+                continue
+            start, cpu_start = time.perf_counter(), time.process_time()
+            img = getattr(self, f'_{stage}')(img)
+            self.last_timings[stage] = (
+                (time.perf_counter() - start) * 1000, (time.process_time() - cpu_start) * 1000
+            )
+
+        return img
+
+    def _crop(self, gray: np.ndarray) -> np.ndarray:
+        """Crop to the largest bright region (the page) when it doesn't fill the frame"""
+        height, width = gray.shape
+        # The page outline survives downscaling, so low-memory mode finds it on a small copy
+        scale = min(1.0, 1000.0 / max(gray.shape)) if self.low_memory else 1.0
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+        blurred = cv2.GaussianBlur(small, (5, 5), 0)
+        _, mask = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=blurred)
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return gray
+
+        x, y, w, h = (int(round(v / scale)) for v in cv2.boundingRect(max(contours, key=cv2.contourArea)))
+        area_ratio = (w * h) / float(width * height)
+        if area_ratio < self.min_document_area or area_ratio > 0.95:
+            return gray
+
+        return gray[y:y + h, x:x + w]
+
+    def _deskew(self, gray: np.ndarray) -> np.ndarray:
+        """Rotate so text lines are horizontal"""
+        # Estimate on a small copy; the angle doesn't depend on resolution
+        scale = min(1.0, 1000.0 / max(gray.shape))
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+        _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+        coords = cv2.findNonZero(ink)
+        if coords is None or len(coords) < 100:
+            return gray
+
+        angle = cv2.minAreaRect(coords)[-1]
+        # OpenCV versions disagree on the angle range; bring it into (-45, 45]
+        if angle > 45:
+            angle -= 90
+        elif angle <= -45:
+            angle += 90
+
+        if abs(angle) < 0.5 or abs(angle) > self.max_skew_angle:
+            return gray
+
+        # The sign convention also varies, so keep whichever rotation gives sharper text rows
+        best_angle = max((0.0, angle, -angle), key=lambda a: self._row_profile_score(ink, a))
+        if best_angle == 0.0:
+            return gray
+
+        return self._rotate(gray, best_angle, border=255)
+
+    def _row_profile_score(self, ink: np.ndarray, angle: float) -> float:
+        """Variance of row ink counts; highest when text lines are horizontal"""
+        rotated = self._rotate(ink, angle, border=0) if angle else ink
+        return float(np.var(np.count_nonzero(rotated, axis=1)))
+
+    @staticmethod
+    def _rotate(img: np.ndarray, angle: float, border: int) -> np.ndarray:
+        height, width = img.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        return cv2.warpAffine(img, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=border)
+
+    def _normalize(self, gray: np.ndarray) -> np.ndarray:
+        """Scale so the median glyph height matches target_text_height"""
+        scale = 1.0
+        text_height = self._estimate_text_height(gray) if self.target_text_height else None
+
+        if text_height:
+            scale = min(max(self.target_text_height / text_height, 0.5), 2.0)
+
+        long_side = max(gray.shape)
+        if long_side * scale > self.max_long_side and scale > 1.0:
+            scale = max(1.0, self.max_long_side / float(long_side))
+        elif not text_height and long_side > self.max_long_side:
+            scale = self.max_long_side / float(long_side)
+
+        if abs(scale - 1.0) < 0.05:
+            return gray
+
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
+
+    def _estimate_text_height(self, gray: np.ndarray) -> Optional[float]:
+        """Median height of glyph-sized connected components"""
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+
+        height, width = gray.shape
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        glyphs = heights[(heights >= 5) & (heights < height * 0.1) & (widths < width * 0.2)]
+
+        if len(glyphs) < 20:
+            return None
+        return float(np.median(glyphs))
+
+    def _in_place_target(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """Buffer to write filter output into, when low_memory allows reusing the input"""
+        if self.low_memory and gray.flags.writeable and gray.flags.c_contiguous:
+            return gray
+        return None
+
+    def _denoise(self, gray: np.ndarray) -> np.ndarray:
+        return cv2.medianBlur(gray, 3, dst=self._in_place_target(gray))
+
+    def _threshold(self, gray: np.ndarray) -> np.ndarray:
+        return cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2,
+            dst=self._in_place_target(gray)
+        )
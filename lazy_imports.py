@@ -0,0 +1,61 @@
+import importlib
+import os
+from typing import Dict, List
+
+# Set EAGER_IMPORTS=1 to import everything up front (e.g. to compare startup cost)
+EAGER = os.environ.get('EAGER_IMPORTS') == '1'
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access"""
+
+    def __init__(self, name: str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+# Every lazily imported module, so workers can load them all up front
+_registry: Dict[str, LazyModule] = {}
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a proxy for a heavy module (imported immediately when EAGER is set)"""
+    module = _registry.get(name)
+    if module is None:
+        module = _registry[name] = LazyModule(name)
+    if EAGER:
+        module._load()
+    return module
+
+def load_all() -> List[str]:
+    """Import every registered module; returns the names that failed to import"""
+    failed = []
+    for name, module in _registry.items():
+        try:
+            module._load()
+        except ImportError as e:
+            print(f"Could not import {name}: {e}")
+            failed.append(name)
+    return failed
+
+def loaded_modules() -> List[str]:
+    """Names of registered modules that have actually been imported"""
+    return [name for name, module in _registry.items() if module.is_loaded]
@@ -0,0 +1,109 @@
+import gc
+import math
+import os
+import sys
+from typing import Optional
+
+from lazy_imports import lazy_import
+
+# resource is Unix-only; on Windows memory is read through psutil when it is installed
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+fitz = lazy_import('fitz')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process right now (the peak where only that is known, else None)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return peak_rss_bytes()
+
+def peak_rss_bytes() -> Optional[int]:
+    """Highest resident set size since start or the last reset_peak_rss() (None when it can't be measured)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    return None
+
+def reset_peak_rss() -> bool:
+    """Lower the RSS high-water mark to the current RSS (Linux 4.0+); False where that isn't possible"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+class MemoryBudget:
+    """Per-worker memory limit that image sizes and page handling are derived from.
+
+    Where the process's memory can't be measured (Windows without psutil)
+    nothing is bounded: sizes stay at their configured values.
+    """
+
+    # Full-size grayscale buffers alive at once while a page or photo is preprocessed
+    WORKING_COPIES = 3
+
+    def __init__(self, limit_mb: int, min_image_pixels: int = 1_000_000):
+        """
+        limit_mb: resident memory the worker process should stay under
+        min_image_pixels: never shrink OCR input below this, even without headroom
+        """
+        self.limit_bytes = int(limit_mb) * 1024 * 1024
+        self.min_image_pixels = min_image_pixels
+
+    def headroom_bytes(self) -> Optional[int]:
+        rss = current_rss_bytes()
+        return None if rss is None else max(0, self.limit_bytes - rss)
+
+    def max_image_pixels(self) -> Optional[int]:
+        """Largest grayscale image the remaining headroom can preprocess (None = unbounded)"""
+        headroom = self.headroom_bytes()
+        if headroom is None:
+            return None
+        return max(self.min_image_pixels, headroom // self.WORKING_COPIES)
+
+    def dpi_for_page(self, width_pt: float, height_pt: float, dpi: int) -> int:
+        """Highest DPI up to ``dpi`` whose rendered page fits in max_image_pixels"""
+        area_in = (width_pt / 72.0) * (height_pt / 72.0)
+        max_pixels = self.max_image_pixels()
+        if area_in <= 0 or max_pixels is None:
+            return dpi
+        fitting = int(math.sqrt(max_pixels / area_in))
+        return max(72, min(dpi, fitting))
+
+    def release(self, force: bool = False):
+        """Drop MuPDF's resource cache and collect garbage when close to the limit"""
+        if not force:
+            rss = current_rss_bytes()
+            if rss is None or rss < self.limit_bytes * 0.8:
+                return
+        try:
+            fitz.TOOLS.store_shrink(100)
+        except (ImportError, AttributeError):
+            pass
+        gc.collect()
@@ -0,0 +1,56 @@
+import threading
+from typing import Iterable, Iterator, List, Optional
+from lazy_imports import lazy_import
+
+spacy = lazy_import('spacy')
+
+SPACY_MODEL = "en_core_web_sm"
+
+# Components that aren't needed for named entities alone
+ENTITY_DISABLE = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer']
+
+# Noun chunks need the parser and POS tags, but not lemmas
+NOUN_CHUNK_DISABLE = ['lemmatizer']
+
+_nlp = None
+_nlp_loaded = False
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """Load the shared spaCy pipeline once per process (None if the model isn't installed)"""
+    global _nlp, _nlp_loaded
+    if _nlp_loaded:
+        return _nlp
+
+    with _nlp_lock:
+        if not _nlp_loaded:
+            try:
+                _nlp = spacy.load(SPACY_MODEL)
+            except OSError:
+                print(f"Please install the spaCy English model: python -m spacy download {SPACY_MODEL}")
+                _nlp = None
+            _nlp_loaded = True
+    return _nlp
+
+def _present(nlp, components: Iterable[str]) -> List[str]:
+    """Only disable components the loaded pipeline actually has"""
+    return [name for name in components if name in nlp.pipe_names]
+
+def parse_batch(texts: List[str], disable: Iterable[str] = (), batch_size: int = 32,
+                n_process: int = 1) -> Iterator:
+    """Stream many texts through nlp.pipe; yields nothing if the model isn't installed"""
+    nlp = get_nlp()
+    if nlp is None:
+        return iter(())
+    return nlp.pipe(texts, disable=_present(nlp, disable), batch_size=batch_size, n_process=n_process)
+
+def extract_person_names(texts: List[str], limit: int = 3, batch_size: int = 32,
+                         n_process: int = 1) -> List[Optional[List[str]]]:
+    """PERSON entities for each text (None for every text if spaCy is unavailable)"""
+    if get_nlp() is None:
+        return [None] * len(texts)
+
+    return [
+        [ent.text for ent in doc.ents if ent.label_ == "PERSON"][:limit]
+        for doc in parse_batch(texts, ENTITY_DISABLE, batch_size, n_process)
+    ]
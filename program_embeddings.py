@@ -0,0 +1,199 @@
+"""Semantic program matching over a precomputed embedding index.
+
+Build the index offline (CPU is fine; it only runs when the catalog changes):
+
+    python program_embeddings.py [--catalog universities.json] [--output program_embeddings]
+
+This writes ``<output>.npy``, a float16 matrix with one L2-normalized row per
+catalog program, and ``<output>.json``, which maps rows to program names and
+records the model used. At query time the matrix is memory-mapped and
+searched brute-force; without sentence-transformers or the index files,
+matching stays lexical.
+"""
+import argparse
+import importlib
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+
+# Index path prefix used when none is given (found next to this module, whatever the working directory)
+DEFAULT_INDEX_PATH = os.environ.get(
+    'PROGRAM_EMBEDDINGS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'program_embeddings')
+)
+
+# Share of the query vector given to the mean of the themes (the course keeps the rest)
+THEME_WEIGHT = 0.3
+
+# Rows scored per matrix product, so only a slice of the mmap is upcast to float32 at a time
+SEARCH_CHUNK_ROWS = 8192
+
+_models: Dict[str, object] = {}
+_models_lock = threading.Lock()
+
+def get_embedding_model(model_name: str = EMBEDDING_MODEL):
+    """Load a sentence-transformers model once per process on CPU (None if it isn't installed)"""
+    with _models_lock:
+        if model_name not in _models:
+            try:
+                sentence_transformers = importlib.import_module('sentence_transformers')
+                _models[model_name] = sentence_transformers.SentenceTransformer(model_name, device='cpu')
+            except (ImportError, OSError) as e:
+                print(f"Semantic program matching disabled ({model_name}): {e}")
+                _models[model_name] = None
+        return _models[model_name]
+
+def program_texts(universities: List[Dict]) -> Tuple[List[str], List[str]]:
+    """Unique program names in catalog order and the text embedded for each (name plus description)"""
+    names, texts = [], []
+    seen = set()
+    for uni in universities:
+        for program in uni.get('programs') or []:
+            entry = program if isinstance(program, dict) else {'name': program}
+            if entry['name'] in seen:
+                continue
+            seen.add(entry['name'])
+            names.append(entry['name'])
+            texts.append(f"{entry['name']}. {entry['description']}" if entry.get('description') else entry['name'])
+    return names, texts
+
+def build_index(universities: List[Dict], path: str = DEFAULT_INDEX_PATH, model_name: str = EMBEDDING_MODEL,
+                batch_size: int = 64) -> int:
+    """Embed every catalog program and write the float16 matrix and id map; returns the row count"""
+    model = get_embedding_model(model_name)
+    if model is None:
+        raise RuntimeError('sentence-transformers is not installed')
+
+    names, texts = program_texts(universities)
+    vectors = model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                           normalize_embeddings=True, show_progress_bar=False)
+
+    # Written under temporary names and renamed, so readers never map a partial file
+    matrix = np.lib.format.open_memmap(f'{path}.tmp.npy', mode='w+', dtype=np.float16, shape=vectors.shape)
+    matrix[:] = vectors
+    matrix.flush()
+    del matrix
+    with open(f'{path}.tmp.json', 'w') as f:
+        json.dump({'model': model_name, 'dimensions': int(vectors.shape[1]), 'programs': names}, f)
+    os.replace(f'{path}.tmp.npy', f'{path}.npy')
+    os.replace(f'{path}.tmp.json', f'{path}.json')
+    return len(names)
+
+class ProgramEmbeddingIndex:
+    """Memory-mapped program embeddings searched with cached query embeddings"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, query_cache_size: int = 256, min_similarity: float = 0.5):
+        self.path = path
+        self.min_similarity = min_similarity
+        self.programs: List[str] = []
+        self.model_name: Optional[str] = None
+        self._vectors = None
+        self._signature = None
+        self._lock = threading.Lock()
+        # Applicants' courses and SOP themes repeat a lot; remember their embeddings
+        self._embed = lru_cache(maxsize=query_cache_size)(self._encode)
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(f'{self.path}.json')
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """Map the index files, again whenever the builder has replaced them"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            vectors, programs, model_name = None, [], None
+            if signature is not None:
+                try:
+                    with open(f'{self.path}.json') as f:
+                        meta = json.load(f)
+                    vectors = np.load(f'{self.path}.npy', mmap_mode='r')
+                    if vectors.shape[0] != len(meta['programs']):
+                        raise ValueError('embedding matrix and id map disagree')
+                    programs, model_name = meta['programs'], meta['model']
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Error loading program embeddings {self.path}: {e}")
+                    vectors = None
+            self._vectors, self.programs, self.model_name = vectors, programs, model_name
+            self._signature = signature
+            self._embed.cache_clear()
+
+    @property
+    def available(self) -> bool:
+        """Whether the index files and the model that built them are both usable"""
+        self._refresh()
+        return self._vectors is not None and get_embedding_model(self.model_name) is not None
+
+    def _encode(self, text: str):
+        model = get_embedding_model(self.model_name)
+        vector = model.encode([text], convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)[0]
+        return vector.astype(np.float32)
+
+    def search(self, query: str, themes: Sequence[str] = (), k: int = 10,
+               theme_weight: float = THEME_WEIGHT) -> List[Tuple[str, float]]:
+        """Programs most similar to a query, best first (empty when unavailable).
+
+        ``themes`` (e.g. key themes of the SoP) steer the query: their mean
+        embedding is blended in with ``theme_weight``, so a single stray theme
+        can't pull in an unrelated program on its own.
+        """
+        query = ' '.join((query or '').lower().split())
+        themes = [' '.join(theme.lower().split()) for theme in themes if theme and theme.strip()]
+        if not query or not self.available:
+            return []
+
+        query_vector = self._embed(query)
+        if themes:
+            theme_vector = np.mean([self._embed(theme) for theme in themes], axis=0)
+            query_vector = (1 - theme_weight) * query_vector + theme_weight * theme_vector
+            query_vector /= np.linalg.norm(query_vector) or 1.0
+
+        vectors = self._vectors
+        scores = np.empty(vectors.shape[0], dtype=np.float32)
+        for start in range(0, vectors.shape[0], SEARCH_CHUNK_ROWS):
+            chunk = np.asarray(vectors[start:start + SEARCH_CHUNK_ROWS], dtype=np.float32)
+            # Cosine similarity (rows and query are normalized)
+            scores[start:start + len(chunk)] = chunk @ query_vector
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.programs[i], float(scores[i])) for i in top if scores[i] >= self.min_similarity]
+
+_indexes: Dict[str, ProgramEmbeddingIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_embedding_index(path: str = DEFAULT_INDEX_PATH) -> ProgramEmbeddingIndex:
+    """The process-wide embedding index for a path"""
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = ProgramEmbeddingIndex(path)
+        return _indexes[path]
+
+def main():
+    from university_catalog import DEFAULT_CATALOG_PATH, read_catalog_rows
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG_PATH, help='JSON file or SQLite database')
+    parser.add_argument('--output', default=DEFAULT_INDEX_PATH, help='path prefix for the .npy and .json files')
+    parser.add_argument('--model', default=EMBEDDING_MODEL)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    count = build_index(read_catalog_rows(args.catalog), args.output, args.model, args.batch_size)
+    print(f"Embedded {count} programs into {args.output}.npy")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set
+
+# Abbreviations applicants use for program names, expanded before lookup
+PROGRAM_SYNONYMS = {
+    'cs': 'computer science',
+    'cse': 'computer science engineering',
+    'ai': 'artificial intelligence',
+    'ml': 'machine learning',
+    'ds': 'data science',
+    'ee': 'electrical engineering',
+    'ece': 'electrical computer engineering',
+    'me': 'mechanical engineering',
+    'it': 'information technology',
+    'is': 'information systems',
+    'mba': 'business administration',
+    'bba': 'business administration',
+    'econ': 'economics',
+    'math': 'mathematics',
+    'maths': 'mathematics',
+    'stats': 'statistics',
+    'bio': 'biology',
+    'chem': 'chemistry',
+    'psych': 'psychology',
+    'arch': 'architecture',
+    'med': 'medicine',
+}
+
+# Words that don't tell programs apart (degree names and fillers)
+STOP_WORDS = {
+    'of', 'and', 'in', 'the', 'for', 'with', 'a', 'an', 'program', 'programme', 'degree',
+    'master', 'masters', 'bachelor', 'bachelors', 'ms', 'msc', 'ma', 'bs', 'bsc', 'ba', 'phd', 'doctorate',
+}
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+def _stem(token: str) -> str:
+    # Plural/singular agreement is all program names need ("Arts", "Systems")
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+def normalize_terms(text: str) -> List[str]:
+    """Lowercase tokens of a program name with abbreviations expanded and stop words dropped"""
+    terms = []
+    for token in TOKEN_RE.findall(text.lower()):
+        for word in PROGRAM_SYNONYMS.get(token, token).split():
+            if word not in STOP_WORDS:
+                terms.append(_stem(word))
+    return terms
+
+class ProgramIndex:
+    """Inverted index from normalized program terms to program ids"""
+
+    def __init__(self, program_names: Iterable[str], fuzzy=True, ngram_size=3, min_similarity=0.5):
+        """Index every program name's terms.
+
+        Query terms that aren't indexed fall back to indexed terms they are a
+        prefix of, then (with ``fuzzy``) to the closest terms by character
+        n-grams, so truncated and misspelled course names still resolve.
+        """
+        self.program_count = 0
+        self.postings: Dict[str, Set[int]] = {}
+        for program_id, name in enumerate(program_names):
+            self.program_count += 1
+            for term in normalize_terms(name):
+                self.postings.setdefault(term, set()).add(program_id)
+
+        # Sorted terms answer prefix queries ("comp", "sci") by bisection
+        self.sorted_terms = sorted(self.postings)
+        self.ngram_size = ngram_size
+        self.min_similarity = min_similarity
+        self.ngrams: Optional[Dict[str, Set[str]]] = None
+        if fuzzy:
+            self.ngrams = {}
+            for term in self.postings:
+                for gram in self._ngrams(term):
+                    self.ngrams.setdefault(gram, set()).add(term)
+
+    def _ngrams(self, term: str) -> Set[str]:
+        padded = f'^{term}$'
+        size = self.ngram_size
+        return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+    def prefixed_terms(self, prefix: str, min_length=3) -> List[str]:
+        """Indexed terms starting with prefix (prefixes shorter than min_length match nothing)"""
+        if len(prefix) < min_length:
+            return []
+        terms = []
+        for i in range(bisect_left(self.sorted_terms, prefix), len(self.sorted_terms)):
+            if not self.sorted_terms[i].startswith(prefix):
+                break
+            terms.append(self.sorted_terms[i])
+        return terms
+
+    def closest_terms(self, term: str) -> List[str]:
+        """Indexed terms most similar to term by n-gram Dice coefficient (empty below min_similarity)"""
+        if self.ngrams is None:
+            return []
+        grams = self._ngrams(term)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self.ngrams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        best_score = self.min_similarity
+        best = []
+        for candidate, count in shared.items():
+            score = 2 * count / (len(grams) + len(self._ngrams(candidate)))
+            if score > best_score:
+                best_score, best = score, [candidate]
+            elif score == best_score:
+                best.append(candidate)
+        return best
+
+    def lookup(self, query: str) -> List[int]:
+        """Ids of programs containing every term of the query, sorted; an empty query matches all"""
+        if not query.strip():
+            return list(range(self.program_count))
+
+        matched: Optional[Set[int]] = None
+        for term in normalize_terms(query):
+            ids = self.postings.get(term)
+            if ids is None:
+                ids = set()
+                for close_term in self.prefixed_terms(term) or self.closest_terms(term):
+                    ids |= self.postings[close_term]
+            matched = set(ids) if matched is None else matched & ids
+            if not matched:
+                return []
+        return sorted(matched or ())
@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+class ScorePercentiles:
+    """Sorted AI overall scores per applicant segment, kept current from analysis_results"""
+
+    # Segments an application's score is counted in, most specific first
+    SEGMENTS = ('university', 'course', 'all')
+
+    def __init__(self, db_path='app.db', min_samples=20):
+        self.db_path = db_path
+        # Segments with fewer scores than this are too small to rank against
+        self.min_samples = min_samples
+        self._scores: Dict[Tuple[str, str], List[float]] = {}
+        # Latest counted score and segment keys per application, so re-analyses replace it
+        self._latest: Dict[int, Tuple[float, List[Tuple[str, str]]]] = {}
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _segment_keys(university: Optional[str], course: Optional[str]) -> List[Tuple[str, str]]:
+        keys = [('all', '')]
+        if university and university.strip():
+            keys.append(('university', university.strip().lower()))
+        if course and course.strip():
+            keys.append(('course', course.strip().lower()))
+        return keys
+
+    def _record(self, application_id: int, score: float, university: Optional[str], course: Optional[str]):
+        previous = self._latest.get(application_id)
+        if previous:
+            old_score, old_keys = previous
+            for key in old_keys:
+                scores = self._scores[key]
+                del scores[bisect_left(scores, old_score)]
+
+        keys = self._segment_keys(university, course)
+        for key in keys:
+            insort(self._scores.setdefault(key, []), score)
+        self._latest[application_id] = (score, keys)
+
+    def refresh(self):
+        """Fold in AI analyses stored since the last refresh (a primary-key range read, not a scan)"""
+        with self._lock:
+            try:
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT ar.id, ar.application_id, ar.confidence_score, a.target_university, a.course
+                    FROM analysis_results ar
+                    JOIN applications a ON a.id = ar.application_id
+                    WHERE ar.id > ? AND ar.analysis_type = 'ai_recommendations'
+                      AND ar.confidence_score IS NOT NULL
+                    ORDER BY ar.id
+                ''', (self._last_id,))
+                rows = cursor.fetchall()
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Error loading score percentiles: {e}")
+                return
+
+            for row_id, application_id, score, university, course in rows:
+                self._record(application_id, float(score), university, course)
+                self._last_id = row_id
+
+    def rank(self, score: float, university: Optional[str] = None, course: Optional[str] = None,
+             application_id: Optional[int] = None) -> Optional[Dict]:
+        """Percentile of a score among applicants, in the most specific segment with enough scores.
+
+        The percentile is the share of scores below it, counting ties as
+        half. A re-analyzed application isn't ranked against its own earlier
+        score: pass its ``application_id``. Returns None when even the whole
+        pool is smaller than min_samples.
+        """
+        self.refresh()
+        keys = dict((kind, (kind, value)) for kind, value in self._segment_keys(university, course))
+
+        with self._lock:
+            own_score, own_keys = self._latest.get(application_id, (None, ()))
+            for kind in self.SEGMENTS:
+                key = keys.get(kind)
+                scores = self._scores.get(key) if key else None
+                if not scores:
+                    continue
+                count = len(scores)
+                below = bisect_left(scores, score)
+                ties = bisect_right(scores, score) - below
+                # Take the application's own earlier score out of the counts
+                if key in own_keys:
+                    count -= 1
+                    if own_score < score:
+                        below -= 1
+                    elif own_score == score:
+                        ties -= 1
+                if count < self.min_samples:
+                    continue
+                return {
+                    'percentile': round((below + ties / 2) / count * 100, 1),
+                    'segment': kind,
+                    'segment_value': key[1],
+                    'sample_size': count
+                }
+        return None
+
+_instances: Dict[str, ScorePercentiles] = {}
+_instances_lock = threading.Lock()
+
+def get_score_percentiles(db_path='app.db') -> ScorePercentiles:
+    """The process-wide percentile engine for a database"""
+    with _instances_lock:
+        if db_path not in _instances:
+            _instances[db_path] = ScorePercentiles(db_path)
+        return _instances[db_path]
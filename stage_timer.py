@@ -0,0 +1,211 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from memory_budget import peak_rss_bytes, reset_peak_rss
+
+# resource is Unix-only; without it child processes' CPU time isn't counted
+try:
+    import resource
+except ImportError:
+    resource = None
+
+MB = 1024 * 1024
+
+# Upper bounds (ms) of the wall time histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Stages open in this process, each with the highest RSS seen before the high-water mark was last
+# reset. The mark is process-wide: a stage starting resets it, so the enclosing stages keep its
+# value first
+_open_peaks: List[List[int]] = []
+_open_peaks_lock = threading.Lock()
+
+def _start_peak() -> Optional[List[int]]:
+    """Start measuring a stage's peak RSS (None where the high-water mark can't be reset)"""
+    with _open_peaks_lock:
+        peak = peak_rss_bytes()
+        if peak is None or not reset_peak_rss():
+            return None
+        for frame in _open_peaks:
+            frame[0] = max(frame[0], peak)
+        frame = [0]
+        _open_peaks.append(frame)
+        return frame
+
+def _end_peak(frame: Optional[List[int]]) -> Optional[float]:
+    """Highest RSS (MB) since _start_peak returned frame"""
+    if frame is None:
+        return None
+    with _open_peaks_lock:
+        _open_peaks.remove(frame)
+        return max(frame[0], peak_rss_bytes() or 0) / MB
+
+def _cpu_seconds() -> float:
+    """CPU time of this process plus finished children (the tesseract CLI runs as one)"""
+    if resource is None:
+        return time.process_time()
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+class StageTimer:
+    """Collects wall time, CPU time, work counts and peak memory per pipeline stage"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict] = {}
+
+    @contextmanager
+    def stage(self, name: str, **counts):
+        """Time a block; counts (pages, pixels, chars, ...) can be added to the yielded dict"""
+        work = dict(counts)
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        peak = _start_peak()
+        try:
+            yield work
+        finally:
+            self.add(name, (time.perf_counter() - wall_start) * 1000, (_cpu_seconds() - cpu_start) * 1000,
+                     peak_rss_mb=_end_peak(peak), **work)
+
+    def add(self, name: str, wall_ms: float, cpu_ms: float, peak_rss_mb: Optional[float] = None, **counts):
+        entry = self.stages.setdefault(name, {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0})
+        entry['calls'] += 1
+        entry['wall_ms'] += wall_ms
+        entry['cpu_ms'] += cpu_ms
+        for key, value in counts.items():
+            entry[key] = entry.get(key, 0) + value
+        # Highest RSS while the stage ran, including buffers it freed again before returning
+        if peak_rss_mb is not None:
+            entry['peak_rss_mb'] = max(entry.get('peak_rss_mb', peak_rss_mb), peak_rss_mb)
+
+    def merge(self, other: 'StageTimer'):
+        for name, other_entry in other.stages.items():
+            entry = self.stages.setdefault(name, {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0})
+            for key, value in other_entry.items():
+                entry[key] = max(entry.get(key, value), value) if key == 'peak_rss_mb' else entry.get(key, 0) + value
+
+    def as_dict(self) -> Dict[str, Dict]:
+        return {
+            name: {key: round(value, 2) if isinstance(value, float) else value for key, value in entry.items()}
+            for name, entry in self.stages.items()
+        }
+
+class StageTimingStore:
+    """Per-stage timings of past analyses, aggregated for the admin analytics"""
+
+    def __init__(self, db_path='app.db'):
+        self.db_path = db_path
+
+    def initialize_table(self):
+        """Create the stage timing table"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stage_timings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                application_id INTEGER,
+                document_type TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                wall_ms REAL NOT NULL,
+                cpu_ms REAL NOT NULL,
+                pages INTEGER DEFAULT 0,
+                pixels INTEGER DEFAULT 0,
+                stage_peak_rss_mb REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (application_id) REFERENCES applications (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_stage_timings_type_stage
+            ON stage_timings (document_type, stage, created_at)
+        ''')
+
+        # Older tables recorded the worker's lifetime peak or the RSS growth over a stage instead
+        cursor.execute('PRAGMA table_info(stage_timings)')
+        if 'stage_peak_rss_mb' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE stage_timings ADD COLUMN stage_peak_rss_mb REAL')
+
+        conn.commit()
+        conn.close()
+
+    def record(self, application_id: int, timings: Dict, conn: Optional[sqlite3.Connection] = None):
+        """Store the per-document stages of an analysis payload's ``timings`` section"""
+        rows = [
+            (application_id, document['document_type'], stage, entry['calls'], entry['wall_ms'],
+             entry['cpu_ms'], entry.get('pages', 0), entry.get('pixels', 0), entry.get('peak_rss_mb'))
+            for document in timings.get('documents', [])
+            for stage, entry in document['stages'].items()
+        ]
+        if not rows:
+            return
+
+        own_connection = conn is None
+        if own_connection:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.executemany('''
+            INSERT INTO stage_timings
+                (application_id, document_type, stage, calls, wall_ms, cpu_ms, pages, pixels, stage_peak_rss_mb)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        if own_connection:
+            conn.commit()
+            conn.close()
+
+    def histograms(self, days: int = 30, document_type: Optional[str] = None) -> List[Dict]:
+        """Wall time distribution per (document type, stage), slowest median first"""
+        start_date = datetime.now() - timedelta(days=days)
+        query = '''
+            SELECT document_type, stage, wall_ms, cpu_ms, pages, pixels, stage_peak_rss_mb
+            FROM stage_timings WHERE created_at >= ?
+        '''
+        params = [start_date.strftime('%Y-%m-%d %H:%M:%S')]
+        if document_type:
+            query += ' AND document_type = ?'
+            params.append(document_type)
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+
+        groups = {}
+        for doc_type, stage, wall_ms, cpu_ms, pages, pixels, peak_rss_mb in rows:
+            group = groups.setdefault((doc_type, stage), {'wall': [], 'cpu': 0.0, 'pages': 0, 'pixels': 0, 'rss': None})
+            group['wall'].append(wall_ms)
+            group['cpu'] += cpu_ms
+            group['pages'] += pages or 0
+            group['pixels'] += pixels or 0
+            if peak_rss_mb is not None:
+                group['rss'] = max(group['rss'] or peak_rss_mb, peak_rss_mb)
+
+        report = []
+        for (doc_type, stage), group in groups.items():
+            walls = sorted(group['wall'])
+            counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            for wall_ms in walls:
+                counts[next((i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if wall_ms < bound),
+                            len(HISTOGRAM_BUCKETS_MS))] += 1
+
+            labels = [f'<{bound}ms' for bound in HISTOGRAM_BUCKETS_MS] + [f'>={HISTOGRAM_BUCKETS_MS[-1]}ms']
+            report.append({
+                'document_type': doc_type,
+                'stage': stage,
+                'samples': len(walls),
+                'p50_ms': round(walls[len(walls) // 2], 1),
+                'p95_ms': round(walls[min(len(walls) - 1, int(len(walls) * 0.95))], 1),
+                'max_ms': round(walls[-1], 1),
+                'avg_cpu_ms': round(group['cpu'] / len(walls), 1),
+                'pages': group['pages'],
+                'pixels': group['pixels'],
+                'peak_rss_mb': round(group['rss'], 1) if group['rss'] is not None else None,
+                'histogram': [{'bucket': label, 'count': count} for label, count in zip(labels, counts)]
+            })
+
+        report.sort(key=lambda item: -item['p50_ms'])
+        return report
@@ -0,0 +1,240 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from lazy_imports import lazy_import
+from program_index import ProgramIndex
+
+np = lazy_import('numpy')
+
+# Catalog source used when none is given: a JSON file or a SQLite database (the bundled
+# file is found next to this module, whatever the working directory)
+DEFAULT_CATALOG_PATH = os.environ.get(
+    'UNIVERSITY_CATALOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'universities.json')
+)
+
+# Academic levels a row is offered at when the catalog doesn't say
+ACADEMIC_LEVELS = ('undergraduate', 'masters', 'phd')
+
+class UniversityCatalog:
+    """University/program rows stored as column arrays for vectorized matching"""
+
+    # Numeric columns and the dtype each is held in
+    INT_COLUMNS = ('ranking', 'min_gre', 'min_toefl', 'tuition')
+    FLOAT_COLUMNS = ('min_gpa', 'acceptance_rate')
+
+    def __init__(self, universities: Iterable[Dict]):
+        """Build one row per (university, program); a university's rows are contiguous.
+
+        Requirements can be given per program as well: a program entry may be
+        a dict with 'name' plus any of the numeric columns or 'levels',
+        overriding the university's values for that row.
+        """
+        self.universities: List[Dict] = list(universities)
+        self.program_names: List[str] = []
+        self.program_lookup: Dict[str, int] = {}
+        program_lookup = self.program_lookup
+
+        columns = {column: [] for column in self.INT_COLUMNS + self.FLOAT_COLUMNS}
+        university_rows = []
+        program_ids = []
+        starts = []
+        countries = {}
+        levels = {}
+
+        for index, uni in enumerate(self.universities):
+            starts.append(len(university_rows))
+            for program in uni.get('programs') or [None]:
+                row = len(university_rows)
+                overrides = program if isinstance(program, dict) else {'name': program}
+                name = overrides.get('name')
+                if name is None:
+                    program_ids.append(-1)
+                else:
+                    if name not in program_lookup:
+                        program_lookup[name] = len(self.program_names)
+                        self.program_names.append(name)
+                    program_ids.append(program_lookup[name])
+                for column, values in columns.items():
+                    values.append(overrides.get(column, uni.get(column, 0)) or 0)
+                university_rows.append(index)
+
+                countries.setdefault((uni.get('country') or '').lower(), []).append(row)
+                for level in overrides.get('levels') or uni.get('levels') or ACADEMIC_LEVELS:
+                    levels.setdefault(level.lower(), []).append(row)
+
+        for column in self.INT_COLUMNS:
+            setattr(self, column, np.asarray(columns[column], dtype=np.int64))
+        for column in self.FLOAT_COLUMNS:
+            setattr(self, column, np.asarray(columns[column], dtype=np.float64))
+        self.program_ids = np.asarray(program_ids, dtype=np.int64)
+        self.university_rows = np.asarray(university_rows, dtype=np.int64)
+        self.university_starts = np.asarray(starts, dtype=np.int64)
+
+        # Secondary indexes: sorted row numbers per country, academic level and program
+        self.country_index = {key: np.asarray(rows, dtype=np.int64) for key, rows in countries.items()}
+        self.level_index = {key: np.asarray(rows, dtype=np.int64) for key, rows in levels.items()}
+        program_rows = {}
+        for row, program_id in enumerate(program_ids):
+            if program_id >= 0:
+                program_rows.setdefault(program_id, []).append(row)
+        self.program_index = {key: np.asarray(rows, dtype=np.int64) for key, rows in program_rows.items()}
+        # Program terms (with synonyms and n-grams) to program ids
+        self.program_terms = ProgramIndex(self.program_names)
+
+    @property
+    def size(self) -> int:
+        """Number of university/program rows"""
+        return len(self.university_rows)
+
+    def candidate_rows(self, countries: Optional[Iterable[str]] = None,
+                       academic_level: Optional[str] = None) -> Optional['np.ndarray']:
+        """Sorted rows passing the filters from the indexes, or None when nothing is filtered"""
+        rows = None
+        if countries:
+            parts = [self.country_index.get(country.lower()) for country in countries]
+            parts = [part for part in parts if part is not None]
+            rows = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        # Levels the catalog never mentions don't filter anything
+        level_rows = self.level_index.get((academic_level or '').lower())
+        if level_rows is not None:
+            rows = level_rows if rows is None else np.intersect1d(rows, level_rows, assume_unique=True)
+        return rows
+
+    def matching_program_ids(self, target_program: str) -> List[int]:
+        """Ids of programs matching every term of target_program (synonyms and misspellings included)"""
+        return self.program_terms.lookup(target_program)
+
+    def program_rows(self, program_ids: Iterable[int]) -> 'np.ndarray':
+        """Sorted rows offering any of the given programs"""
+        parts = [self.program_index[program_id] for program_id in program_ids if program_id in self.program_index]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def record(self, row: int) -> Dict:
+        """The university of a row as a plain dict, with the row's program and requirements"""
+        uni = self.universities[self.university_rows[row]]
+        program_id = self.program_ids[row]
+        record = {
+            'name': uni.get('name'),
+            'country': uni.get('country'),
+            'programs': [
+                program['name'] if isinstance(program, dict) else program for program in uni.get('programs') or []
+            ],
+            'program': self.program_names[program_id] if program_id >= 0 else None
+        }
+        for column in self.INT_COLUMNS + self.FLOAT_COLUMNS:
+            record[column] = getattr(self, column)[row].item()
+        return record
+
+def read_catalog_rows(path: str) -> List[Dict]:
+    """Read university dicts from a JSON file or a SQLite database.
+
+    A SQLite catalog has a ``university_programs`` table with one row per
+    program: university, country, ranking, min_gpa, min_gre, min_toefl,
+    acceptance_rate, tuition, program and levels (comma-separated, empty for
+    every level). Requirements that differ between a university's rows are
+    kept per program.
+    """
+    if path.endswith('.json'):
+        with open(path) as f:
+            return json.load(f)
+
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT university, country, ranking, min_gpa, min_gre, min_toefl,
+               acceptance_rate, tuition, program, levels
+        FROM university_programs ORDER BY university, rowid
+    ''')
+    rows = cursor.fetchall()
+    conn.close()
+
+    universities = []
+    for (name, country, ranking, min_gpa, min_gre, min_toefl,
+         acceptance_rate, tuition, program, levels) in rows:
+        if not universities or universities[-1]['name'] != name:
+            universities.append({
+                'name': name, 'country': country, 'ranking': ranking, 'min_gpa': min_gpa,
+                'min_gre': min_gre, 'min_toefl': min_toefl, 'acceptance_rate': acceptance_rate,
+                'tuition': tuition, 'programs': []
+            })
+        uni = universities[-1]
+        entry = {'name': program}
+        for column, value in (('ranking', ranking), ('min_gpa', min_gpa), ('min_gre', min_gre),
+                              ('min_toefl', min_toefl), ('acceptance_rate', acceptance_rate),
+                              ('tuition', tuition)):
+            if value != uni[column]:
+                entry[column] = value
+        if levels:
+            entry['levels'] = [level.strip() for level in levels.split(',') if level.strip()]
+        uni['programs'].append(entry)
+    return universities
+
+class CatalogSource:
+    """A catalog file loaded once per process and swapped out when the file changes"""
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        self.path = path
+        self._catalog: Optional[UniversityCatalog] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._load_lock = threading.Lock()
+        self._reloading = threading.Lock()
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, signature) -> UniversityCatalog:
+        if signature is None:
+            raise FileNotFoundError('catalog file not found')
+        catalog = UniversityCatalog(read_catalog_rows(self.path))
+        # A single reference assignment, so readers see either the old catalog or the new one
+        self._catalog, self._signature = catalog, signature
+        return catalog
+
+    def get(self) -> UniversityCatalog:
+        """Current catalog; a changed file is reloaded in the background while the old one keeps serving"""
+        catalog = self._catalog
+        signature = self._file_signature()
+
+        if catalog is None:
+            with self._load_lock:
+                if self._catalog is None:
+                    try:
+                        return self._load(signature)
+                    except Exception as e:
+                        print(f"Error loading university catalog {self.path}: {e}; "
+                              f"no universities will be recommended")
+                        self._catalog, self._signature = UniversityCatalog([]), signature
+                return self._catalog
+
+        if signature != self._signature and self._reloading.acquire(blocking=False):
+            threading.Thread(target=self._reload, args=(signature,), daemon=True).start()
+        return catalog
+
+    def _reload(self, signature):
+        try:
+            self._load(signature)
+        except Exception as e:
+            # Keep serving the previous catalog (also when the file was removed);
+            # a half-written file is retried on its next change
+            print(f"Error reloading university catalog {self.path}: {e}")
+            self._signature = signature
+        finally:
+            self._reloading.release()
+
+_sources: Dict[str, CatalogSource] = {}
+_sources_lock = threading.Lock()
+
+def get_catalog_source(path: str = DEFAULT_CATALOG_PATH) -> CatalogSource:
+    """The process-wide source for a catalog path"""
+    with _sources_lock:
+        if path not in _sources:
+            _sources[path] = CatalogSource(path)
+        return _sources[path]
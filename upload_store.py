@@ -0,0 +1,151 @@
+import sqlite3
+import hashlib
+import os
+import time
+import uuid
+from typing import Optional, Tuple
+
+class UploadStore:
+    """Content-addressed storage for uploaded documents, shared between applications by hash"""
+
+    def __init__(self, root='uploads', db_path='app.db', chunk_size=1024 * 1024):
+        self.root = root
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.db_path = db_path
+        self.chunk_size = chunk_size
+
+    def initialize_table(self):
+        """Create the blob table and add documents.content_hash to older databases"""
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS upload_blobs (
+                content_hash TEXT PRIMARY KEY,
+                file_path TEXT NOT NULL,
+                file_size INTEGER NOT NULL,
+                ref_count INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        cursor.execute('PRAGMA table_info(documents)')
+        if 'content_hash' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE documents ADD COLUMN content_hash TEXT')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents (content_hash)')
+
+        conn.commit()
+        conn.close()
+
+    def blob_path(self, content_hash: str, extension: str) -> str:
+        # Two-character fan-out keeps directories small
+        return os.path.join(self.blob_dir, content_hash[:2], f"{content_hash}.{extension}")
+
+    def _stream_to_temp(self, stream) -> Tuple[str, str, int]:
+        """Copy an upload stream to a temp file, hashing each chunk as it is written"""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        temp_path = os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            with open(temp_path, 'wb') as out:
+                for chunk in iter(lambda: stream.read(self.chunk_size), b''):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        return temp_path, digest.hexdigest(), size
+
+    def save(self, file, extension: str, cursor) -> Tuple[str, str, int]:
+        """Store an uploaded file and take a reference to its blob.
+
+        ``cursor`` must belong to the transaction that inserts the documents
+        row, so the reference and the row are committed together. Returns
+        (content_hash, file_path, file_size).
+        """
+        temp_path, content_hash, size = self._stream_to_temp(file.stream)
+
+        try:
+            # Taking the reference first waits out any concurrent delete of the same blob
+            cursor.execute('''
+                INSERT INTO upload_blobs (content_hash, file_path, file_size, ref_count)
+                VALUES (?, ?, ?, 1)
+                ON CONFLICT(content_hash) DO UPDATE SET ref_count = ref_count + 1
+            ''', (content_hash, self.blob_path(content_hash, extension), size))
+            cursor.execute('SELECT file_path FROM upload_blobs WHERE content_hash = ?', (content_hash,))
+            file_path = cursor.fetchone()[0]
+
+            if os.path.exists(file_path):
+                # Already stored by another upload
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                os.replace(temp_path, file_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return content_hash, file_path, size
+
+    def release(self, content_hash: str, cursor) -> Optional[str]:
+        """Drop one reference; deletes the blob and returns its path when it was the last one"""
+        cursor.execute('''
+            UPDATE upload_blobs SET ref_count = ref_count - 1 WHERE content_hash = ?
+        ''', (content_hash,))
+        cursor.execute('SELECT file_path, ref_count FROM upload_blobs WHERE content_hash = ?', (content_hash,))
+        row = cursor.fetchone()
+
+        if not row or row[1] > 0:
+            return None
+
+        cursor.execute('DELETE FROM upload_blobs WHERE content_hash = ?', (content_hash,))
+        # Removed before the transaction commits, so a concurrent save re-creating it can't lose the file
+        if os.path.exists(row[0]):
+            os.remove(row[0])
+        return row[0]
+
+    def collect_garbage(self, min_age_seconds: int = 3600) -> int:
+        """Recount references from documents and remove unreferenced blobs and stray files"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            UPDATE upload_blobs SET ref_count = (
+                SELECT COUNT(*) FROM documents WHERE documents.content_hash = upload_blobs.content_hash
+            )
+        ''')
+        cursor.execute('SELECT file_path FROM upload_blobs WHERE ref_count <= 0')
+        orphaned = [row[0] for row in cursor.fetchall()]
+        cursor.execute('DELETE FROM upload_blobs WHERE ref_count <= 0')
+
+        cursor.execute('SELECT file_path FROM upload_blobs')
+        known = {os.path.normpath(row[0]) for row in cursor.fetchall()}
+
+        removed = 0
+        for path in orphaned:
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+
+        # Files left behind by uploads whose transaction rolled back (or crashed mid-write)
+        cutoff = time.time() - min_age_seconds
+        for directory in (self.blob_dir, self.tmp_dir):
+            for dirpath, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    path = os.path.normpath(os.path.join(dirpath, filename))
+                    if path not in known and os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+
+        conn.commit()
+        conn.close()
+        return removed
@@ -0,0 +1,323 @@
+"""Run document verification over many applications at once.
+
+Usage:
+    python verification_sweep.py [--status pending] [--since 2024-01-01] [--until 2024-02-01]
+                                 [--workers N] [--batch-size 50] [--sweep-id NAME] [--retry-failed]
+                                 [--memory-budget-mb MB] [--region-ocr]
+
+Applications are analyzed across a process pool. Results are written to
+analysis_results in batches, and every finished application is checkpointed
+in the same transaction, so re-running a killed sweep with the same
+selection skips the work it already stored.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from document_processor import DocumentAnalyzer, warm_up
+from document_state import DocumentStateStore
+from stage_timer import StageTimingStore
+
+APPLICATION_COLUMNS = ['id', 'user_id', 'full_name', 'email', 'phone', 'date_of_birth',
+                       'nationality', 'target_university', 'course', 'academic_level',
+                       'gpa', 'gre_score', 'toefl_score', 'ielts_score', 'work_experience',
+                       'statement_of_purpose', 'status', 'created_at', 'updated_at']
+
+# Analyzer owned by each sweep worker process
+_sweep_analyzer = None
+
+def _init_sweep_worker(tesseract_path: Optional[str], db_path: str, memory_budget_mb: Optional[int] = None,
+                       region_ocr=False):
+    """Load models once per worker; PDFs are extracted serially since the sweep is already parallel"""
+    global _sweep_analyzer
+    _sweep_analyzer = DocumentAnalyzer(
+        tesseract_path, state_store=DocumentStateStore(db_path), memory_budget_mb=memory_budget_mb,
+        region_ocr=region_ocr
+    )
+    _sweep_analyzer.processor.pdf_workers = 1
+    warm_up()
+
+def _analyze_application(application_id: int, documents: List[Dict], form_data: Dict) -> Tuple:
+    """Worker entry point: returns (application_id, results, confidence, documents, pages)"""
+    analysis_results = _sweep_analyzer.analyze_application_documents(application_id, documents, form_data)
+    pages = sum(
+        _sweep_analyzer.processor.count_pages(doc['file_path'], doc['mime_type']) for doc in documents
+    )
+    confidence = analysis_results['summary']['overall_confidence']
+    return application_id, analysis_results, confidence, len(documents), pages
+
+class VerificationSweep:
+    """Select applications, analyze them in parallel and checkpoint progress"""
+
+    def __init__(self, db_path='app.db', statuses=('pending',), since=None, until=None,
+                 sweep_id=None, workers=None, batch_size=50, tesseract_path=None, retry_failed=False,
+                 memory_budget_mb=None, region_ocr=False):
+        self.db_path = db_path
+        self.statuses = list(statuses)
+        self.since = since
+        self.until = until
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.tesseract_path = tesseract_path
+        self.retry_failed = retry_failed
+        self.memory_budget_mb = memory_budget_mb
+        self.region_ocr = region_ocr
+        # The same selection resumes the same sweep unless a name is given
+        self.sweep_id = sweep_id or self._default_sweep_id()
+
+    def _default_sweep_id(self) -> str:
+        selection = json.dumps([sorted(self.statuses), self.since, self.until])
+        return 'sweep-' + hashlib.sha1(selection.encode('utf-8')).hexdigest()[:12]
+
+    def initialize_table(self):
+        """Create the checkpoint and stage timing tables"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sweep_checkpoints (
+                sweep_id TEXT NOT NULL,
+                application_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                result_id INTEGER,
+                error TEXT,
+                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (sweep_id, application_id)
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+        StageTimingStore(self.db_path).initialize_table()
+
+    def _selection(self) -> Tuple[str, List]:
+        """WHERE clause and parameters for the selected applications"""
+        clauses = []
+        params = []
+        if self.statuses:
+            clauses.append(f"status IN ({', '.join('?' for _ in self.statuses)})")
+            params.extend(self.statuses)
+        if self.since:
+            clauses.append('DATE(created_at) >= DATE(?)')
+            params.append(self.since)
+        if self.until:
+            clauses.append('DATE(created_at) < DATE(?)')
+            params.append(self.until)
+        return (' AND '.join(clauses) or '1 = 1'), params
+
+    def pending_applications(self) -> List[Tuple[int, Dict, List[Dict]]]:
+        """(application_id, form_data, documents) for every selected application not yet checkpointed"""
+        where, params = self._selection()
+        skip_statuses = ('completed',) if self.retry_failed else ('completed', 'failed')
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(f'''
+            SELECT * FROM applications
+            WHERE {where} AND id NOT IN (
+                SELECT application_id FROM sweep_checkpoints
+                WHERE sweep_id = ? AND status IN ({', '.join('?' for _ in skip_statuses)})
+            )
+            ORDER BY id
+        ''', params + [self.sweep_id, *skip_statuses])
+        applications = cursor.fetchall()
+
+        # One query for all documents instead of one per application
+        cursor.execute(f'''
+            SELECT application_id, document_type, original_filename, stored_filename, file_path, mime_type, id,
+                   content_hash
+            FROM documents WHERE application_id IN (SELECT id FROM applications WHERE {where})
+        ''', params)
+        documents = {}
+        for row in cursor.fetchall():
+            documents.setdefault(row[0], []).append({
+                'document_type': row[1],
+                'original_filename': row[2],
+                'stored_filename': row[3],
+                'file_path': row[4],
+                'mime_type': row[5],
+                'id': row[6],
+                'content_hash': row[7]
+            })
+
+        conn.close()
+
+        return [
+            (application[0], dict(zip(APPLICATION_COLUMNS, application)), documents[application[0]])
+            for application in applications if application[0] in documents
+        ]
+
+    def _flush(self, completed: List[Tuple], failed: List[Tuple]):
+        """Store a batch of results and their checkpoints in one transaction"""
+        if not completed and not failed:
+            return
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.cursor()
+
+        checkpoints = []
+        timing_store = StageTimingStore(self.db_path)
+        for application_id, analysis_results, confidence in completed:
+            cursor.execute('''
+                INSERT INTO analysis_results (application_id, analysis_type, result_data, confidence_score)
+                VALUES (?, ?, ?, ?)
+            ''', (application_id, 'document_verification', json.dumps(analysis_results), confidence))
+            checkpoints.append((self.sweep_id, application_id, 'completed', cursor.lastrowid, None))
+            timing_store.record(application_id, analysis_results.get('timings', {}), conn)
+
+        checkpoints.extend((self.sweep_id, application_id, 'failed', None, error) for application_id, error in failed)
+        cursor.executemany('''
+            INSERT OR REPLACE INTO sweep_checkpoints (sweep_id, application_id, status, result_id, error)
+            VALUES (?, ?, ?, ?, ?)
+        ''', checkpoints)
+
+        conn.commit()
+        conn.close()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_sweep_worker,
+                                   initargs=(self.tesseract_path, self.db_path, self.memory_budget_mb, self.region_ocr))
+
+    def run(self) -> Dict:
+        """Analyze every pending application; returns throughput statistics"""
+        self.initialize_table()
+        work = self.pending_applications()
+        stats = {'sweep_id': self.sweep_id, 'applications': 0, 'failed': 0, 'documents': 0, 'pages': 0}
+
+        print(f"Sweep {self.sweep_id}: {len(work)} applications to analyze with {self.workers} workers")
+        if not work:
+            return stats
+
+        start = time.perf_counter()
+        completed, failed = [], []
+        queue = deque(work)
+        # Applications that were in flight when a worker crashed. Each is retried on its own,
+        # so a second crash is pinned on the application that caused it
+        suspects = deque()
+        in_flight = {}
+
+        def collect(future) -> bool:
+            """Record a finished future; False when its worker crashed and took the pool down"""
+            item, alone = in_flight.pop(future)
+            application_id = item[0]
+            try:
+                _, analysis_results, confidence, doc_count, pages = future.result()
+                completed.append((application_id, analysis_results, confidence))
+                stats['documents'] += doc_count
+                stats['pages'] += pages
+            except BrokenProcessPool as e:
+                if alone:
+                    print(f"Application {application_id} failed: it crashed its worker")
+                    failed.append((application_id, f'worker crashed: {e}'))
+                else:
+                    suspects.append(item)
+                return False
+            except Exception as e:
+                print(f"Application {application_id} failed: {e}")
+                failed.append((application_id, str(e)))
+            return True
+
+        def flush():
+            nonlocal completed, failed
+            stats['applications'] += len(completed)
+            stats['failed'] += len(failed)
+            self._flush(completed, failed)
+            completed, failed = [], []
+
+        executor = self._new_executor()
+        try:
+            while queue or suspects or in_flight:
+                broken = False
+                if suspects:
+                    batch, limit, alone = suspects, 1, True
+                else:
+                    # Keep a bounded number queued so thousands of payloads aren't pickled up front
+                    batch, limit, alone = queue, self.workers * 2, False
+                while batch and len(in_flight) < limit:
+                    item = batch.popleft()
+                    application_id, form_data, documents = item
+                    try:
+                        future = executor.submit(_analyze_application, application_id, documents, form_data)
+                    except BrokenProcessPool:
+                        batch.appendleft(item)
+                        broken = True
+                        break
+                    in_flight[future] = (item, alone)
+
+                if in_flight and not broken:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        broken = not collect(future) or broken
+
+                if broken:
+                    # A crashed worker (OOM kill, segfault in Tesseract or MuPDF) fails every future on the
+                    # pool: keep what finished and retry the rest one at a time on a fresh pool
+                    print("Worker pool crashed; retrying its in-flight applications on a new pool")
+                    executor.shutdown(wait=False)
+                    wait(in_flight)
+                    for future in list(in_flight):
+                        collect(future)
+                    flush()
+                    executor = self._new_executor()
+                elif len(completed) + len(failed) >= self.batch_size:
+                    flush()
+                    self._report(stats, start, len(work))
+        finally:
+            executor.shutdown()
+            flush()
+
+        stats['seconds'] = time.perf_counter() - start
+        self._report(stats, start, len(work))
+        return stats
+
+    @staticmethod
+    def _report(stats: Dict, start: float, total: int):
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        done = stats['applications'] + stats['failed']
+        print(f"[{done}/{total}] {stats['documents'] / elapsed:.2f} documents/sec, "
+              f"{stats['pages'] / elapsed:.2f} pages/sec, {stats['failed']} failed, {elapsed:.0f}s elapsed")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='app.db')
+    parser.add_argument('--status', action='append', dest='statuses',
+                        help='application status to include (repeatable, default: pending)')
+    parser.add_argument('--since', help='only applications created on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--until', help='only applications created before this date (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=50, help='applications per database write')
+    parser.add_argument('--sweep-id', help='checkpoint name (defaults to one derived from the selection)')
+    parser.add_argument('--tesseract-path')
+    parser.add_argument('--retry-failed', action='store_true', help='re-run applications that failed last time')
+    parser.add_argument('--memory-budget-mb', type=int, help='resident memory limit per worker')
+    parser.add_argument('--region-ocr', action='store_true',
+                        help='run full-quality OCR only on text blocks near score keywords')
+    args = parser.parse_args()
+
+    sweep = VerificationSweep(
+        db_path=args.db,
+        statuses=args.statuses or ['pending'],
+        since=args.since,
+        until=args.until,
+        sweep_id=args.sweep_id,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        tesseract_path=args.tesseract_path,
+        retry_failed=args.retry_failed,
+        memory_budget_mb=args.memory_budget_mb,
+        region_ocr=args.region_ocr
+    )
+    stats = sweep.run()
+    print(f"Done: {stats['applications']} applications analyzed, {stats['failed']} failed")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+import mmap
+import os
+import re
+import shutil
+import struct
+import subprocess
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Iterator, List
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Tags inside a paragraph that stand for whitespace rather than text runs
+_BREAK_TAGS = {WORD_NS + 'tab': '\t', WORD_NS + 'br': '\n', WORD_NS + 'cr': '\n'}
+
+def _docx_parts(archive: zipfile.ZipFile) -> List[str]:
+    """Text-bearing parts in reading order: headers, body, footnotes, footers"""
+    names = archive.namelist()
+    headers = sorted(name for name in names if re.fullmatch(r'word/header\d*\.xml', name))
+    footers = sorted(name for name in names if re.fullmatch(r'word/footer\d*\.xml', name))
+    body = [name for name in ('word/document.xml', 'word/footnotes.xml') if name in names]
+    return headers + body + footers
+
+def iter_docx_paragraphs(file_path: str) -> Iterator[str]:
+    """Yield paragraph text from a .docx without building the whole XML tree"""
+    with zipfile.ZipFile(file_path) as archive:
+        for part in _docx_parts(archive):
+            with archive.open(part) as stream:
+                pieces = []
+                for event, elem in ET.iterparse(stream, events=('end',)):
+                    tag = elem.tag
+                    if tag == WORD_NS + 't':
+                        pieces.append(elem.text or '')
+                    elif tag in _BREAK_TAGS:
+                        pieces.append(_BREAK_TAGS[tag])
+                    elif tag == WORD_NS + 'p':
+                        yield ''.join(pieces)
+                        pieces = []
+                        # Drop parsed paragraphs so memory stays flat for long documents
+                        elem.clear()
+
+def iter_docx_text(file_path: str, chunk_chars: int = 4000) -> Iterator[str]:
+    """Yield .docx text in chunks of roughly chunk_chars, split on paragraph boundaries"""
+    chunk = []
+    size = 0
+    for paragraph in iter_docx_paragraphs(file_path):
+        chunk.append(paragraph + '\n')
+        size += len(paragraph) + 1
+        if size >= chunk_chars:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
+
+# External converters for legacy binary .doc files, tried in order
+DOC_CONVERTERS = [
+    ['antiword', '-w', '0'],
+    ['catdoc', '-w'],
+]
+
+# Runs of readable text stored as UTF-16LE or 8-bit characters in the binary file
+_UTF16_RUN = re.compile(rb'(?:[\x20-\x7e\t\r\n]\x00){4,}')
+_ANSI_RUN = re.compile(rb'[\x20-\x7e\t\r\n]{4,}')
+
+def extract_doc_text(file_path: str, timeout: int = 30) -> str:
+    """Text of a legacy Word 97-2003 .doc file.
+
+    Uses antiword or catdoc when one is installed; otherwise reads the text
+    through the document's piece table, and as a last resort pulls readable
+    text runs out of the binary (enough for the field patterns, but layout
+    is lost).
+    """
+    for command in DOC_CONVERTERS:
+        if shutil.which(command[0]) is None:
+            continue
+        try:
+            output = subprocess.run(
+                command + [file_path], capture_output=True, timeout=timeout, check=True
+            ).stdout
+            return output.decode('utf-8', errors='replace').strip()
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"{command[0]} failed on {os.path.basename(file_path)}: {e}")
+
+    return _scan_doc_text(file_path)
+
+_OLE_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+# Sector numbers at or above this mark the end of a chain (or free/FAT sectors)
+_MAX_SECTOR = 0xFFFFFFFA
+
+class _CompoundFile:
+    """Just enough of the OLE2 compound file format to read a .doc's streams"""
+
+    def __init__(self, data):
+        if data[:8] != _OLE_SIGNATURE:
+            raise ValueError('not an OLE2 compound file')
+        self.data = data
+        self.sector_size = 1 << struct.unpack_from('<H', data, 0x1E)[0]
+        self.mini_sector_size = 1 << struct.unpack_from('<H', data, 0x20)[0]
+        (fat_count, first_dir, _, self.mini_cutoff,
+         first_minifat, minifat_count, first_difat, difat_count) = struct.unpack_from('<8I', data, 0x2C)
+
+        # The FAT's own sectors: 109 listed in the header, the rest in a chain of DIFAT sectors
+        fat_sectors = list(struct.unpack_from('<109I', data, 0x4C))
+        per_sector = self.sector_size // 4
+        sector = first_difat
+        for _ in range(difat_count):
+            if sector >= _MAX_SECTOR:
+                break
+            entries = struct.unpack_from(f'<{per_sector}I', data, self._offset(sector))
+            fat_sectors.extend(entries[:-1])
+            sector = entries[-1]
+        self.fat = self._table(fat_sectors[:fat_count])
+
+        self.entries = {}
+        directory = self._read_chain(first_dir, self.fat, self._sector)
+        for pos in range(0, len(directory) - 127, 128):
+            name_length, entry_type = struct.unpack_from('<HB', directory, pos + 0x40)
+            if entry_type == 0 or name_length < 2:
+                continue
+            name = directory[pos:pos + name_length - 2].decode('utf-16-le', errors='replace')
+            start, size = struct.unpack_from('<II', directory, pos + 0x74)
+            self.entries[name] = (entry_type, start, size)
+
+        self.minifat = self._table(self._chain(first_minifat, self.fat)[:minifat_count])
+        root_start = self.entries.get('Root Entry', (5, _MAX_SECTOR, 0))[1]
+        self.mini_stream = self._read_chain(root_start, self.fat, self._sector)
+
+    def _offset(self, sector: int) -> int:
+        return (sector + 1) * self.sector_size
+
+    def _sector(self, sector: int) -> bytes:
+        offset = self._offset(sector)
+        return self.data[offset:offset + self.sector_size]
+
+    def _table(self, sectors: List[int]) -> tuple:
+        raw = b''.join(self._sector(sector) for sector in sectors)
+        return struct.unpack(f'<{len(raw) // 4}I', raw)
+
+    @staticmethod
+    def _chain(start: int, table: tuple) -> List[int]:
+        chain = []
+        sector = start
+        # A damaged file can loop its chain; no chain is longer than the table
+        while sector < _MAX_SECTOR and len(chain) <= len(table):
+            chain.append(sector)
+            sector = table[sector] if sector < len(table) else _MAX_SECTOR
+        return chain
+
+    def _read_chain(self, start: int, table: tuple, read) -> bytes:
+        return b''.join(read(sector) for sector in self._chain(start, table))
+
+    def stream(self, name: str) -> bytes:
+        if name not in self.entries:
+            raise ValueError(f'no {name} stream')
+        _, start, size = self.entries[name]
+        if size < self.mini_cutoff:
+            mini = self.mini_sector_size
+
+            def read(sector):
+                return self.mini_stream[sector * mini:(sector + 1) * mini]
+
+            return self._read_chain(start, self.minifat, read)[:size]
+        return self._read_chain(start, self.fat, self._sector)[:size]
+
+# FIB fields of Word 97 and later files
+_FIB_IDENT = 0xA5EC
+_FIB_WORD97 = 0x00C1
+_FIB_ENCRYPTED = 0x0100
+_FIB_TABLE_1 = 0x0200
+_FIB_CLX = 0x01A2
+
+def _read_piece_table(data) -> str:
+    """Text of a Word 97+ .doc, piece by piece in the encoding each piece is stored in"""
+    container = _CompoundFile(data)
+    word = container.stream('WordDocument')
+    ident, version = struct.unpack_from('<HH', word, 0)
+    if ident != _FIB_IDENT or version < _FIB_WORD97:
+        raise ValueError('not a Word 97 or later document')
+    flags = struct.unpack_from('<H', word, 0x0A)[0]
+    if flags & _FIB_ENCRYPTED:
+        raise ValueError('document is encrypted')
+    table = container.stream('1Table' if flags & _FIB_TABLE_1 else '0Table')
+
+    # The CLX: property modifiers (type 1) followed by the piece table (type 2)
+    clx_offset, clx_size = struct.unpack_from('<II', word, _FIB_CLX)
+    clx = table[clx_offset:clx_offset + clx_size]
+    pos = 0
+    while pos < len(clx) and clx[pos] == 1:
+        pos += 3 + struct.unpack_from('<H', clx, pos + 1)[0]
+    if pos >= len(clx) or clx[pos] != 2:
+        raise ValueError('no piece table')
+    size = struct.unpack_from('<I', clx, pos + 1)[0]
+    pieces = (size - 4) // 12
+    cps = struct.unpack_from(f'<{pieces + 1}I', clx, pos + 5)
+    descriptors = pos + 5 + 4 * (pieces + 1)
+
+    text = []
+    for i in range(pieces):
+        fc = struct.unpack_from('<I', clx, descriptors + 8 * i + 2)[0]
+        length = cps[i + 1] - cps[i]
+        if fc & 0x40000000:
+            # Compressed piece: one cp1252 byte per character
+            start = (fc & 0x3FFFFFFF) // 2
+            text.append(word[start:start + length].decode('cp1252', errors='replace'))
+        else:
+            start = fc & 0x3FFFFFFF
+            text.append(word[start:start + 2 * length].decode('utf-16-le', errors='replace'))
+    return ''.join(text)
+
+# Field codes (\x13 instructions \x14 result \x15): the instructions aren't document text
+_FIELD_WITHOUT_RESULT = re.compile('\x13[^\x13\x14\x15]*\x15')
+_FIELD_INSTRUCTIONS = re.compile('\x13[^\x13\x14\x15]*\x14')
+# Word's special characters: paragraph/line/page/section breaks, cell marks, object anchors
+_DOC_CONTROL_CHARS = {
+    **{code: None for code in range(0x20) if chr(code) not in '\t\n'},
+    0x0D: '\n', 0x0B: '\n', 0x0C: '\n', 0x07: '\t', 0x1E: '-',
+}
+
+def _clean_doc_text(text: str) -> str:
+    text = _FIELD_WITHOUT_RESULT.sub('', text)
+    text = _FIELD_INSTRUCTIONS.sub('', text)
+    return text.translate(_DOC_CONTROL_CHARS)
+
+def _scan_doc_text(file_path: str) -> str:
+    if os.path.getsize(file_path) == 0:
+        return ''
+
+    # Scan a memory map rather than reading the whole binary into the heap
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        try:
+            return _clean_doc_text(_read_piece_table(data)).strip()
+        except (ValueError, IndexError, struct.error) as e:
+            print(f"Could not read the text of {os.path.basename(file_path)}: {e}; scanning for text runs")
+
+        # Word 6/95, encrypted or damaged files. Every Word file holds UTF-16 runs (font and style
+        # names) and many hold their body as 8-bit text, so keep whichever scan finds more
+        utf16 = [run.decode('utf-16-le') for run in _UTF16_RUN.findall(data)]
+        ansi = [run.decode('latin-1') for run in _ANSI_RUN.findall(data)]
+    runs = max(utf16, ansi, key=lambda found: sum(len(run) for run in found))
+
+    text = '\n'.join(run.strip() for run in runs if run.strip())
+    return text.replace('\r', '\n')